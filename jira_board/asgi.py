@@ -3,5 +3,17 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jira_board.settings')
+os.environ.setdefault('GRAPHQL_ASYNC', '1')
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported after setup, the schema needs the app registry
+from task.websocket import graphql_websocket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        await graphql_websocket(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,80 @@
+import contextvars
+import itertools
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+
+class ReplicaPool:
+    """ Picks the replica alias for the next read-only operation """
+
+    def __init__(self, aliases, strategy="round_robin"):
+        self.aliases = list(aliases)
+        self.strategy = strategy
+        self.in_flight = {alias: 0 for alias in self.aliases}
+        self._cycle = itertools.cycle(self.aliases)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.strategy == "least_loaded":
+                alias = min(self.aliases, key=lambda name: self.in_flight[name])
+            else:
+                alias = next(self._cycle)
+            self.in_flight[alias] += 1
+            return alias
+
+    def release(self, alias):
+        with self._lock:
+            self.in_flight[alias] -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_replica_pool():
+    """ Returns the pool over DATABASE_REPLICAS, or None when no replica is configured """
+    global _pool
+    with _pool_lock:
+        if _pool is None and settings.DATABASE_REPLICAS:
+            _pool = ReplicaPool(settings.DATABASE_REPLICAS, settings.DATABASE_REPLICA_STRATEGY)
+        return _pool
+
+
+@contextmanager
+def read_from_replica():
+    """ Sends the reads of the enclosed block to one replica; yields its alias, or None without replicas """
+    pool = get_replica_pool()
+    if pool is None:
+        yield None
+        return
+
+    alias = pool.acquire()
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+        pool.release(alias)
+
+
+class ReplicaRouter:
+    """ Reads go to the replica chosen for the current operation, everything else to the primary """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
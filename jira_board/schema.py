@@ -1,13 +1,27 @@
-import graphene
-from task.schema import Query as TaskQuery, Mutation as TaskMutation
+from functools import cache
 
 
-class Query(TaskQuery, graphene.ObjectType):
-    pass
+@cache
+def get_schema():
+    """ Builds the project schema on first use; every later caller shares the same instance """
+    # deferred so importing this module (settings, URLconf, management commands) stays cheap
+    import graphene
+    from task.schema import Query as TaskQuery, Mutation as TaskMutation, Subscription as TaskSubscription
 
+    class Query(TaskQuery, graphene.ObjectType):
+        pass
 
-class Mutation(TaskMutation, graphene.ObjectType):
-    pass
+    class Mutation(TaskMutation, graphene.ObjectType):
+        pass
 
+    class Subscription(TaskSubscription, graphene.ObjectType):
+        pass
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+    return graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
+
+
+def __getattr__(name):
+    # GRAPHENE["SCHEMA"] points at jira_board.schema.schema, resolved through here on first access
+    if name == "schema":
+        return get_schema()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -69,18 +70,55 @@ DB_PASSWORD: str = ''
 DB_HOST: str = ''
 DB_PORT: int = 0
 
+# CONNECTION REUSE
+# Seconds a connection is kept open across requests; CONN_HEALTH_CHECKS re-checks it before reuse.
+# asgi.py defaults this to 0 because async requests do not share persistent connections: use DB_POOL there
+DB_CONN_MAX_AGE: int = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+# psycopg 3 connection pool (pip install "psycopg[binary,pool]") instead of persistent connections.
+# Every worker process has its own pool, so the server needs workers * DB_POOL_MAX_SIZE connections
+DB_POOL: bool = os.environ.get('DB_POOL', '') == '1'
+DB_POOL_MIN_SIZE: int = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE: int = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+# Seconds a request waits for a free pooled connection before failing
+DB_POOL_TIMEOUT: int = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'django.db.backends.postgresql',
         'NAME': DB_NAME,
         'USER': DB_USER,
         'PASSWORD': DB_PASSWORD,
         'HOST': DB_HOST,
-        'PORT': DB_PORT
+        'PORT': DB_PORT,
+        # pooled connections go back to the pool at the end of every request
+        'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pool': {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT
+            }
+        } if DB_POOL else {}
     }
 }
 
 
+# READ REPLICAS
+# Comma-separated replica hosts, each added as DATABASES['replica_<n>'] with the primary's credentials
+for index, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['jira_board.routers.ReplicaRouter']
+# Aliases that serve GraphQL query operations; mutations and everything outside GraphQL use 'default'
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica_')]
+# 'round_robin', or 'least_loaded' (fewest operations in flight in this process)
+DATABASE_REPLICA_STRATEGY = os.environ.get('DB_REPLICA_STRATEGY', 'round_robin')
+# After a mutation the client reads from the primary for this long, covering replication lag
+DATABASE_REPLICA_STICKY_SECONDS = 5
+DATABASE_REPLICA_STICKY_COOKIE = 'board_primary_until'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -126,4 +164,55 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # GRAPHENE SETTINGS
 GRAPHENE = {
     'SCHEMA': 'jira_board.schema.schema'
-}
\ No newline at end of file
+}
+
+# asgi.py turns this on so /graphql/ is served by the async view; WSGI workers keep the sync one
+GRAPHQL_ASYNC = os.environ.get('GRAPHQL_ASYNC', '') == '1'
+
+# Root mutation fields with async resolvers: under ASGI they run on the event loop instead of the single
+# thread shared by every synchronous mutation, e.g. createUser awaits bcrypt on the hashing pool
+GRAPHQL_ASYNC_MUTATIONS = ['createUser']
+
+# PERSISTED QUERIES
+# JSON file mapping sha256 hashes to registered query documents
+GRAPHQL_PERSISTED_QUERIES_MANIFEST: str = ''
+# Reject every document that is not in the manifest
+GRAPHQL_PERSISTED_QUERIES_ONLY = False
+
+# RESPONSE CACHE
+# Redis shared by every worker (pip install redis), e.g. CACHE_REDIS_URL=redis://127.0.0.1:6379/1
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', '')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL
+        }
+    }
+# 'django' uses CACHES[GRAPHQL_RESPONSE_CACHE_ALIAS] so invalidations reach every worker; 'local' keeps results
+# per process, where other workers serve pre-write data until the timeout, so only use it with a single worker.
+# Off ('') unless a shared cache is configured
+GRAPHQL_RESPONSE_CACHE_BACKEND = os.environ.get('GRAPHQL_RESPONSE_CACHE_BACKEND', 'django' if CACHE_REDIS_URL else '')
+GRAPHQL_RESPONSE_CACHE_ALIAS = 'default'
+GRAPHQL_RESPONSE_CACHE_TIMEOUT = 60
+
+# PROFILING
+# '' disables it, 'header' profiles requests sending "X-GraphQL-Profile: 1",
+# 'all' profiles and logs every request (latency histograms at /graphql/metrics/)
+GRAPHQL_PROFILING = os.environ.get('GRAPHQL_PROFILING', '')
+# Return the profile in the response "extensions" to requests sending the header; it contains SQL text
+GRAPHQL_PROFILING_EXTENSIONS = DEBUG
+# Profiled requests slower than this are logged in full at WARNING level
+GRAPHQL_SLOW_QUERY_MS = 500
+
+# BENCHMARKS
+# Point the app at a throwaway SQLite file instead of PostgreSQL, e.g. BENCH_SQLITE=/tmp/bench.sqlite3
+if os.environ.get('BENCH_SQLITE'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['BENCH_SQLITE'],
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True
+    }
+    # the baseline key is empty and Django refuses to start without one; benchmarks never sign anything real
+    SECRET_KEY = SECRET_KEY or 'bench-only-not-a-secret'
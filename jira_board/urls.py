@@ -1,11 +1,16 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+from task.views import AsyncGraphQLView, BoardGraphQLView, board_export, graphql_metrics
+
+graphql_view = AsyncGraphQLView if settings.GRAPHQL_ASYNC else BoardGraphQLView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
 
-    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path("graphql/", csrf_exempt(graphql_view.as_view(graphiql=True))),
+    path("graphql/metrics/", graphql_metrics),
+    path("export/<str:kind>/", board_export),
 
 ]
@@ -1,6 +1,65 @@
 """ BCRYPT_KEY DETAILS """
 BCRYPT_ROUNDS = 10
 BCRYPT_ALGORITHM = b'2b'
+BCRYPT_EXECUTOR = 'thread'  # 'thread' or 'process'
+BCRYPT_WORKERS = 4
+BCRYPT_MAX_PENDING = 64
+BCRYPT_QUEUE_TIMEOUT = 5
 
 """ REGEX DETAILS """
-EMAIL_REGEX = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
\ No newline at end of file
+EMAIL_REGEX = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+""" PAGINATION DETAILS """
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+""" GRAPHQL DOCUMENT DETAILS """
+DOCUMENT_CACHE_SIZE = 500
+RESPONSE_CACHE_SIZE = 1000
+RESPONSE_CACHE_TAG_SIZE = 100000
+RESPONSE_CACHE_CLOCK_SKEW = 1.0  # seconds the clocks of the writing and the reading worker may disagree by
+
+""" TASK TREE DETAILS """
+TASK_TREE_MAX_DEPTH = 20
+
+""" QUERY COMPLEXITY DETAILS """
+DEFAULT_LIST_SIZE = 20  # assumed length of list fields without a first argument
+MAX_QUERY_COST = 100000  # the catalogue's epic board costs 80401 when its page sizes come from variables
+MAX_QUERY_DEPTH = 10
+
+""" PROFILING DETAILS """
+PROFILING_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+PROFILING_MAX_FIELDS = 50
+PROFILING_MAX_OPERATIONS = 200
+
+""" BENCHMARK DETAILS """
+BENCH_BATCH_SIZE = 1000
+BENCH_LATENCY_TOLERANCE = 0.25
+BENCH_STARTUP_RUNS = 5
+BENCH_STARTUP_BUDGET = 1.5  # seconds from interpreter start to the first answered /graphql/ request
+
+""" SEARCH DETAILS """
+SEARCH_CONFIG = 'english'  # text search configuration of the triggers in migration 0004
+SEARCH_HEADLINE_OPTIONS = 'StartSel=<b>, StopSel=</b>, MaxWords=35, MinWords=15, MaxFragments=2'
+SEARCH_SNIPPET_LENGTH = 160
+
+""" BOARD DETAILS """
+BOARD_TASKS_PER_GROUP = 20
+
+""" EXPORT DETAILS """
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per round trip of the server-side cursor
+EXPORT_WRITE_SIZE = 64 * 1024  # characters buffered before a block is handed to the server
+
+""" SUBSCRIPTION DETAILS """
+SUBSCRIPTION_QUEUE_SIZE = 100  # undelivered changes per subscription before it is dropped
+SUBSCRIPTION_MAX_PER_CONNECTION = 20
+SUBSCRIPTION_INIT_TIMEOUT = 10  # seconds a websocket may stay open without connection_init
+
+""" SYNC DETAILS """
+SYNC_SETTLE_SECONDS = 5  # rows younger than this wait for the next changesSince call
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+""" IMPORT DETAILS """
+IMPORT_CHUNK_SIZE = 1000  # rows validated and committed together
+IMPORT_BATCH_SIZE = 500  # rows per INSERT statement
+IMPORT_MAP_SIZE = 100000  # natural keys (user names, epic names, tasks) kept in memory
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from resources.all_purpose import constant
+from resources.all_purpose.common import convert_raw_password_to_hash
+
+
+class HashingBusyError(Exception):
+    pass
+
+
+class PasswordHasher:
+    """ Runs bcrypt on a bounded worker pool; bcrypt releases the GIL so threads hash in parallel """
+
+    def __init__(
+        self,
+        executor=constant.BCRYPT_EXECUTOR,
+        workers=constant.BCRYPT_WORKERS,
+        max_pending=constant.BCRYPT_MAX_PENDING,
+        queue_timeout=constant.BCRYPT_QUEUE_TIMEOUT
+    ):
+        self.executor_kind = executor
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # created on first use so importing this module never forks or spawns threads
+        with self._lock:
+            if self._executor is None:
+                pool_class = ProcessPoolExecutor if self.executor_kind == "process" else ThreadPoolExecutor
+                self._executor = pool_class(max_workers=self.workers)
+            return self._executor
+
+    def submit(self, raw_password, timeout=None):
+        """ Queues one hash, raising HashingBusyError once max_pending hashes are already waiting """
+        if not self._slots.acquire(timeout=self.queue_timeout if timeout is None else timeout):
+            raise HashingBusyError("Password hashing is saturated, please retry.")
+
+        try:
+            future = self._get_executor().submit(convert_raw_password_to_hash, raw_password)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, raw_password):
+        return self.submit(raw_password).result()
+
+    def hash_many(self, raw_passwords):
+        futures = [self.submit(raw_password) for raw_password in raw_passwords]
+        return [future.result() for future in futures]
+
+    async def ahash(self, raw_password):
+        # never block the event loop waiting for a slot
+        return await asyncio.wrap_future(self.submit(raw_password, timeout=0))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,156 @@
+import itertools
+from task import models
+
+_sequence = itertools.count()
+
+
+class Operation:
+    """ One catalogue entry: a document, its variables for the current data set and its SQL budget """
+
+    def __init__(self, name, query, variables=None, max_queries=None, mutation=False):
+        self.name = name
+        self.query = query
+        self.variables = variables or (lambda fixtures: {})
+        self.max_queries = max_queries
+        self.mutation = mutation
+
+
+def load_fixtures():
+    """ Ids the catalogue's variables are drawn from; raises LookupError on an empty database """
+    user = models.JiraUser.objects.order_by("id").first()
+    epic = models.Epic.objects.order_by("id").first()
+    root = models.Task.objects.filter(parent_task__isnull=True, subtasks__isnull=False).order_by("id").first()
+    if user is None or epic is None or root is None:
+        raise LookupError("The database holds no board data; generate it first.")
+    leaf = models.Task.objects.filter(subtasks__isnull=True, parent_task__isnull=False).order_by("id").first()
+    return {"user": user.pk, "epic": epic.pk, "root": root.pk, "leaf": (leaf or root).pk}
+
+
+OPERATIONS = [
+    Operation(
+        "board",
+        """
+        query Board {
+          allEpics(first: 20) {
+            edges { node { name taskCount openTaskCount tasks { name isCompleted owner { userName } assignee { userName } } } }
+          }
+        }
+        """,
+        max_queries=5
+    ),
+    Operation(
+        "assigneeOpenTasks",
+        """
+        query AssigneeOpenTasks($user: ID!) {
+          allTasks(first: 50, assignee: $user, isCompleted: false) {
+            edges { node { name epic { name } comments { comment user { userName } } } }
+            pageInfo { hasNextPage endCursor }
+          }
+        }
+        """,
+        lambda fixtures: {"user": fixtures["user"]},
+        max_queries=5
+    ),
+    Operation(
+        "taskDetail",
+        """
+        query TaskDetail($task: ID!) {
+          task(id: $task) {
+            name description parentTask { name } epic { name taskCount }
+            subtasks { name isCompleted } comments { comment user { userName } }
+          }
+        }
+        """,
+        lambda fixtures: {"task": fixtures["root"]},
+        max_queries=6
+    ),
+    Operation(
+        "taskTree",
+        """
+        query TaskTree($task: ID!) {
+          taskTree(rootId: $task, maxDepth: 5) {
+            depth task { name isCompleted } children { task { name } children { task { name assignee { userName } } } }
+          }
+        }
+        """,
+        lambda fixtures: {"task": fixtures["root"]},
+        max_queries=2
+    ),
+    Operation(
+        "taskAncestors",
+        """
+        query TaskAncestors($task: ID!) { taskAncestors(id: $task) { name epic { name } } }
+        """,
+        lambda fixtures: {"task": fixtures["leaf"]},
+        max_queries=2
+    ),
+    Operation(
+        "usersWithEpics",
+        """
+        query UsersWithEpics {
+          allUsers(first: 20) { edges { node { userName epics { name taskCount completedTaskCount } } } }
+        }
+        """,
+        max_queries=3
+    ),
+    Operation(
+        "recentComments",
+        """
+        query RecentComments {
+          allComments(first: 100) { edges { node { comment user { userName } task { name } } } }
+        }
+        """,
+        max_queries=4
+    ),
+    Operation(
+        "createTasks",
+        """
+        mutation CreateTasks($tasks: [TaskInput!]!) {
+          createTasks(tasks: $tasks) { success results { task { id name } } }
+        }
+        """,
+        lambda fixtures: {
+            "tasks": [
+                {
+                    "name": f"bench created {next(_sequence)}",
+                    "description": "created by the benchmark",
+                    "epic": fixtures["epic"],
+                    "owner": fixtures["user"],
+                    "assignee": fixtures["user"]
+                }
+                for _ in range(10)
+            ]
+        },
+        max_queries=12,
+        mutation=True
+    ),
+    Operation(
+        "updateTasks",
+        """
+        mutation UpdateTasks($tasks: [TaskUpdateInput!]!) {
+          updateTasks(tasks: $tasks) { success }
+        }
+        """,
+        lambda fixtures: {
+            "tasks": [{"id": fixtures["root"], "isCompleted": next(_sequence) % 2 == 0}]
+        },
+        max_queries=10,
+        mutation=True
+    ),
+    Operation(
+        "createComments",
+        """
+        mutation CreateComments($comments: [CommentInput!]!) {
+          createComments(comments: $comments) { success }
+        }
+        """,
+        lambda fixtures: {
+            "comments": [
+                {"task": fixtures["root"], "user": fixtures["user"], "msg": f"bench comment {next(_sequence)}"}
+                for _ in range(10)
+            ]
+        },
+        max_queries=10,
+        mutation=True
+    )
+]
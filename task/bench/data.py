@@ -0,0 +1,102 @@
+import random
+from django.db import transaction
+from resources.all_purpose import constant
+from resources.all_purpose.enums import TaskTypeEnum, UserRoleTypes
+from resources.all_purpose.hashing import hasher
+from task import models
+
+
+def generate(
+    users=20,
+    epics=50,
+    tasks_per_epic=40,
+    subtasks_per_task=2,
+    subtask_depth=2,
+    comments_per_task=3,
+    seed=0,
+    batch_size=constant.BENCH_BATCH_SIZE
+):
+    """ Fills an empty database with a reproducible board; returns the number of rows per table """
+    rng = random.Random(seed)
+    # one bcrypt hash shared by every user, otherwise hashing dominates the generation time
+    password = hasher.hash("bench-password")
+    roles = [choice[0] for choice in UserRoleTypes.choices()]
+
+    with transaction.atomic():
+        user_rows = models.JiraUser.objects.bulk_create(
+            [
+                models.JiraUser(
+                    first_name=f"First{index}",
+                    last_name=f"Last{index}",
+                    role=rng.choice(roles),
+                    user_name=f"bench_user_{index}",
+                    password=password,
+                    email=f"bench_user_{index}@example.com",
+                    mobile_number=f"9{index:09d}"
+                )
+                for index in range(users)
+            ],
+            batch_size=batch_size
+        )
+
+        epic_rows = models.Epic.objects.bulk_create(
+            [
+                models.Epic(name=f"bench_epic_{index}", user=rng.choice(user_rows), is_completed=rng.random() < 0.2)
+                for index in range(epics)
+            ],
+            batch_size=batch_size
+        )
+
+        level = []
+        for epic in epic_rows:
+            for index in range(tasks_per_epic):
+                level.append(_task(rng, user_rows, epic, f"task {epic.pk}-{index}", None))
+        all_tasks = level = models.Task.objects.bulk_create(level, batch_size=batch_size)
+
+        for depth in range(1, subtask_depth + 1):
+            # each level is inserted before the next so children can reference their parents' ids
+            level = models.Task.objects.bulk_create(
+                [
+                    _task(rng, user_rows, parent.epic, f"{parent.name}.{index}", parent)
+                    for parent in level
+                    for index in range(subtasks_per_task)
+                ],
+                batch_size=batch_size
+            )
+            all_tasks = all_tasks + level
+
+        comment_rows = models.Comment.objects.bulk_create(
+            [
+                models.Comment(
+                    task=task,
+                    user=rng.choice(user_rows),
+                    comment=f"comment {index} on {task.name}",
+                    is_deleted=rng.random() < 0.05
+                )
+                for task in all_tasks
+                for index in range(comments_per_task)
+            ],
+            batch_size=batch_size
+        )
+
+        models.Epic.refresh_counters()
+
+    return {
+        "users": len(user_rows),
+        "epics": len(epic_rows),
+        "tasks": len(all_tasks),
+        "comments": len(comment_rows)
+    }
+
+
+def _task(rng, users, epic, name, parent):
+    return models.Task(
+        name=name,
+        description=f"Description of {name}",
+        epic=epic,
+        owner=rng.choice(users),
+        assignee=rng.choice(users),
+        task_type=TaskTypeEnum.SUB_TASK.value if parent else TaskTypeEnum.MAIN_TASK.value,
+        parent_task=parent,
+        is_completed=rng.random() < 0.3
+    )
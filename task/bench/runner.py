@@ -0,0 +1,75 @@
+import json
+import time
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from task.bench.catalogue import load_fixtures
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def request(client, path, operation, fixtures):
+    body = {"query": operation.query, "variables": operation.variables(fixtures)}
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.post(path, json.dumps(body), content_type="application/json")
+        elapsed = time.perf_counter() - started
+    ok = response.status_code == 200 and "errors" not in response.json()
+    return elapsed, len(queries.captured_queries), ok
+
+
+def run_operation(client, path, operation, fixtures, iterations, warmup):
+    for _ in range(warmup):
+        request(client, path, operation, fixtures)
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        samples.append(request(client, path, operation, fixtures))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency * 1000 for latency, _, _ in samples]
+    return {
+        "operation": operation.name,
+        "requests": iterations,
+        "rps": round(iterations / elapsed, 1) if elapsed else 0.0,
+        "p50": round(percentile(latencies, 0.50), 2),
+        "p95": round(percentile(latencies, 0.95), 2),
+        "p99": round(percentile(latencies, 0.99), 2),
+        "queries": max(count for _, count, _ in samples),
+        "failures": sum(1 for _, _, ok in samples if not ok)
+    }
+
+
+def run(operations, iterations, warmup=5, path="/graphql/"):
+    """ Sends every operation through the full Django stack in-process and returns one report per operation """
+    client = Client()
+    fixtures = load_fixtures()
+    return [run_operation(client, path, operation, fixtures, iterations, warmup) for operation in operations]
+
+
+def check(reports, operations, baseline=None, tolerance=0.0):
+    """ Returns the regressions: failures, SQL budgets exceeded, and p95 or query counts above the baseline """
+    budgets = {operation.name: operation.max_queries for operation in operations}
+    previous = {report["operation"]: report for report in (baseline or [])}
+    problems = []
+    for report in reports:
+        name = report["operation"]
+        if report["failures"]:
+            problems.append(f"{name}: {report['failures']} failed requests")
+        if budgets.get(name) is not None and report["queries"] > budgets[name]:
+            problems.append(f"{name}: {report['queries']} SQL queries, budget is {budgets[name]}")
+
+        before = previous.get(name)
+        if before is None:
+            continue
+        if report["queries"] > before["queries"]:
+            problems.append(f"{name}: {report['queries']} SQL queries, baseline had {before['queries']}")
+        if report["p95"] > before["p95"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {report['p95']}ms, baseline {before['p95']}ms (+{tolerance:.0%} allowed)")
+    return problems
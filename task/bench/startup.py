@@ -0,0 +1,54 @@
+# run by bench_startup as `python -m task.bench.startup`: a process boots only once, so every sample is a new interpreter
+import gc
+import json
+import sys
+import time
+
+PHASES = ("imports", "setup", "urls", "schema", "first_request")
+
+
+def measure():
+    """ Boots Django and times each phase up to the first answered request """
+    timings = {}
+    started = time.perf_counter()
+
+    import django
+    from django.conf import settings
+    timings["imports"] = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    django.setup()
+    timings["setup"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    timings["urls"] = time.perf_counter() - mark
+
+    from jira_board.schema import get_schema
+    # the URLconf and settings only name the schema; anything that builds it at boot shows up here
+    built_at_boot = get_schema.cache_info().currsize
+    mark = time.perf_counter()
+    get_schema()
+    timings["schema"] = time.perf_counter() - mark
+
+    settings.ALLOWED_HOSTS = ["*"]
+    from django.test import Client
+    mark = time.perf_counter()
+    response = Client().post("/graphql/", json.dumps({"query": "{ __typename }"}), content_type="application/json")
+    timings["first_request"] = time.perf_counter() - mark
+    timings["total"] = time.perf_counter() - started
+
+    import graphene
+    return {
+        "timings": timings,
+        "status": response.status_code,
+        # more than one means some import path still builds its own schema
+        "schemas": sum(isinstance(instance, graphene.Schema) for instance in gc.get_objects()),
+        "built_at_boot": bool(built_at_boot),
+        "modules": len(sys.modules)
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure()))
@@ -0,0 +1,122 @@
+from collections import defaultdict
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from graphql import GraphQLError
+from resources.all_purpose import constant
+from task import models
+from task.loaders import BatchLoader, get_loaders, get_one
+from task.response_cache import instance_tag
+
+COUNTS = {
+    "assigned_open_count": lambda user: Q(assignee=user, is_completed=False),
+    "assigned_completed_count": lambda user: Q(assignee=user, is_completed=True),
+    "owned_open_count": lambda user: Q(owner=user, is_completed=False),
+    "owned_completed_count": lambda user: Q(owner=user, is_completed=True),
+    "open_count": lambda user: Q(is_completed=False),
+    "completed_count": lambda user: Q(is_completed=True)
+}
+
+
+class BoardEpic:
+    """ One epic of a user's board: its counts, with the task lists fetched for all epics at once """
+
+    def __init__(self, board, counts):
+        self.board = board
+        self.epic_id = counts.pop("epic_id")
+        for name, value in counts.items():
+            setattr(self, name, value)
+
+    def tasks(self, is_completed):
+        groups = self.board.tasks.load(self.epic_id)
+        if self.board.tasks.is_async:
+            return self._atasks(groups, is_completed)
+        return groups.get(is_completed, [])
+
+    async def _atasks(self, groups, is_completed):
+        return (await groups).get(is_completed, [])
+
+
+class Board:
+    """ Tasks a user owns or is assigned, grouped by epic and completion status """
+
+    def __init__(self, user, rows, loaders, tasks_per_group):
+        self.user = user
+        self.loaders = loaders
+        self.epics = [BoardEpic(self, row) for row in rows]
+        for name in COUNTS:
+            setattr(self, name, sum(getattr(epic, name) for epic in self.epics))
+        loaders.epics.prime([epic.epic_id for epic in self.epics])
+
+        def assemble(tasks):
+            loaders.prime(tasks)
+            groups = defaultdict(lambda: defaultdict(list))
+            for task in tasks:
+                groups[task.epic_id][task.is_completed].append(task)
+            return groups
+
+        self.tasks = BatchLoader(
+            lambda epic_ids: board_tasks(user, epic_ids, tasks_per_group),
+            assemble,
+            default={},
+            is_async=loaders.is_async
+        )
+        self.tasks.prime([epic.epic_id for epic in self.epics])
+
+
+def board_counts(user):
+    """ Every count of the board in one GROUP BY epic """
+    return (
+        models.Task.objects.filter(Q(assignee=user) | Q(owner=user))
+        .values("epic_id")
+        .annotate(**{name: Count("id", filter=condition(user)) for name, condition in COUNTS.items()})
+        .order_by("epic_id")
+    )
+
+
+def board_tasks(user, epic_ids, tasks_per_group):
+    """ The oldest tasks_per_group tasks of every (epic, completion status) group, in one query """
+    return (
+        models.Task.objects.filter(Q(assignee=user) | Q(owner=user), epic_id__in=epic_ids)
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=[F("epic_id"), F("is_completed")],
+            order_by=[F("created_at").asc(), F("id").asc()]
+        ))
+        .filter(position__lte=tasks_per_group)
+        .order_by("epic_id", "is_completed", "created_at", "id")
+    )
+
+
+def group_size(tasks_per_group):
+    if tasks_per_group is None:
+        return constant.BOARD_TASKS_PER_GROUP
+    if tasks_per_group < 0:
+        raise GraphQLError("tasksPerGroup must not be negative.")
+    return min(tasks_per_group, constant.MAX_PAGE_SIZE)
+
+
+def load_board(info, user_id, tasks_per_group=None):
+    """ Returns the Board of user_id: one statement for the user, one for all counts, one for all task lists """
+    size = group_size(tasks_per_group)
+    loaders = get_loaders(info)
+
+    user = get_one(info, models.JiraUser.objects.all(), user_id, "User with the given ID does not exist.")
+    if loaders.is_async:
+        return _aload_board(info, user, loaders, size)
+    tag_board(info, user)
+    return Board(user, list(board_counts(user)), loaders, size)
+
+
+def tag_board(info, user):
+    # task writes bump the tags of their owner and assignee, which is exactly what changes a board;
+    # the fetched pk, since "05" or " 5" would name a tag no write ever bumps
+    tags = getattr(info.context, "cache_tags", None)
+    if tags is not None:
+        tags.add(instance_tag(models.JiraUser, user.pk))
+
+
+async def _aload_board(info, user, loaders, size):
+    user = await user
+    tag_board(info, user)
+    rows = [row async for row in board_counts(user)]
+    return Board(user, rows, loaders, size)
@@ -0,0 +1,16 @@
+def parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_by_ids(model, ids):
+    """ Resolves every referenced id of one model with a single in_bulk query """
+    keys = {parse_id(value) for value in ids if value is not None}
+    keys.discard(None)
+    return model.objects.in_bulk(list(keys)) if keys else {}
+
+
+def lookup(rows, value):
+    return rows.get(parse_id(value)) if value is not None else None
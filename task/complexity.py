@@ -0,0 +1,129 @@
+from graphene.relay import Connection
+from graphene.utils.str_converters import to_camel_case
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationType,
+    ValidationRule,
+    get_named_type,
+    get_nullable_type,
+    is_composite_type,
+    is_list_type
+)
+from resources.all_purpose import constant
+
+
+def is_connection(graphql_type):
+    graphene_type = getattr(graphql_type, "graphene_type", None)
+    return isinstance(graphene_type, type) and issubclass(graphene_type, Connection)
+
+
+def field_weight(parent_type, name, field):
+    """ Weight declared in the graphene type's field_costs; otherwise 1 for object fields and 0 for scalars """
+    field_costs = getattr(getattr(parent_type, "graphene_type", None), "field_costs", {})
+    for field_name, weight in field_costs.items():
+        if to_camel_case(field_name) == name:
+            return weight
+    return 1 if is_composite_type(get_named_type(field.type)) else 0
+
+
+def list_size(parent_type, node, field):
+    """ Rows one resolution of the field may return: field_sizes, its first argument, else the default list length """
+    field_sizes = getattr(getattr(parent_type, "graphene_type", None), "field_sizes", {})
+    for field_name, size in field_sizes.items():
+        if to_camel_case(field_name) == node.name.value:
+            return size
+    if "first" in field.args:
+        argument = next((arg for arg in node.arguments if arg.name.value == "first"), None)
+        if argument is None:
+            return constant.DEFAULT_PAGE_SIZE
+        if isinstance(argument.value, IntValueNode):
+            return max(1, min(int(argument.value.value), constant.MAX_PAGE_SIZE))
+        # variables are not known at validation time, so assume the largest page
+        return constant.MAX_PAGE_SIZE
+    if is_list_type(get_nullable_type(field.type)):
+        return constant.DEFAULT_LIST_SIZE
+    return 1
+
+
+class QueryComplexityRule(ValidationRule):
+    """ Rejects operations whose static cost or depth exceeds the configured limits before they execute """
+
+    def enter_operation_definition(self, node, *_args):
+        schema = self.context.schema
+        root_type = {
+            OperationType.QUERY: schema.query_type,
+            OperationType.MUTATION: schema.mutation_type,
+            OperationType.SUBSCRIPTION: schema.subscription_type
+        }.get(node.operation)
+        if root_type is None:
+            return
+
+        cost, depth = self.measure(node.selection_set, root_type, 1, 0, False, frozenset())
+        if depth > constant.MAX_QUERY_DEPTH:
+            self.report_error(GraphQLError(
+                f"Query depth {depth} exceeds the limit of {constant.MAX_QUERY_DEPTH}.", node
+            ))
+        if cost > constant.MAX_QUERY_COST:
+            self.report_error(GraphQLError(
+                f"Query cost {cost} exceeds the limit of {constant.MAX_QUERY_COST}.", node
+            ))
+
+    def measure(self, selection_set, parent_type, multiplier, depth, wrapper, fragments):
+        """ Returns (cost, depth) of a selection set resolved `multiplier` times """
+        cost = 0
+        max_depth = depth
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                field = getattr(parent_type, "fields", {}).get(name)
+                if field is None or name.startswith("__"):
+                    continue
+
+                if not wrapper:
+                    cost += multiplier * field_weight(parent_type, name, field)
+
+                field_type = get_named_type(field.type)
+                if selection.selection_set is None or not is_composite_type(field_type):
+                    continue
+
+                # connection edges and nodes are wrappers: the page size was already counted on the connection
+                size = 1 if wrapper else list_size(parent_type, selection, field)
+                child_depth = depth if wrapper else depth + 1
+                child_cost, child_depth = self.measure(
+                    selection.selection_set,
+                    field_type,
+                    multiplier * size,
+                    child_depth,
+                    is_connection(field_type) or is_connection(parent_type),
+                    fragments
+                )
+                cost += child_cost
+                max_depth = max(max_depth, child_depth)
+
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = self.context.schema.get_type(selection.type_condition.name.value) or parent_type
+                child_cost, child_depth = self.measure(
+                    selection.selection_set, fragment_type, multiplier, depth, wrapper, fragments
+                )
+                cost += child_cost
+                max_depth = max(max_depth, child_depth)
+
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.context.get_fragment(name)
+                if fragment is None or name in fragments:
+                    continue
+                fragment_type = self.context.schema.get_type(fragment.type_condition.name.value) or parent_type
+                child_cost, child_depth = self.measure(
+                    fragment.selection_set, fragment_type, multiplier, depth, wrapper, fragments | {name}
+                )
+                cost += child_cost
+                max_depth = max(max_depth, child_depth)
+
+        return cost, max_depth
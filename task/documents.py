@@ -0,0 +1,123 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from graphql import parse, print_ast
+from graphql.validation import validate
+from resources.all_purpose import constant
+
+
+class PersistedQueryNotFound(Exception):
+    pass
+
+
+class DocumentRejected(Exception):
+    """ A request refused before parsing: no document, a mismatched hash or one outside the allowlist """
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """ Thread-safe least-recently-used mapping with a fixed number of entries """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DocumentCache:
+    """ Parsed and validated documents keyed by the SHA-256 of their text, plus the registered allowlist """
+
+    def __init__(self, max_size, manifest=None):
+        self._documents = LRUCache(max_size)
+        self._normalized = LRUCache(max_size)
+        self._manifest = manifest or {}
+
+    def is_registered(self, sha):
+        return sha in self._manifest
+
+    def checked_hash(self, query, sha):
+        """ Returns the key of the document to run; every transport goes through here for the allowlist """
+        if sha is None:
+            if not query:
+                raise DocumentRejected("Must provide query string.")
+            if settings.GRAPHQL_PERSISTED_QUERIES_ONLY:
+                raise DocumentRejected("Only persisted queries are accepted.")
+            sha = query_hash(query)
+        elif query and query_hash(query) != sha:
+            raise DocumentRejected("provided sha does not match query")
+
+        if settings.GRAPHQL_PERSISTED_QUERIES_ONLY and not self.is_registered(sha):
+            raise DocumentRejected("Persisted query is not registered.")
+        return sha
+
+    def normalized_hash(self, sha, document):
+        """ Hash of the printed document, so texts differing only in whitespace or commas share one key """
+        normalized = self._normalized.get(sha)
+        if normalized is None:
+            normalized = query_hash(print_ast(document))
+            self._normalized.set(sha, normalized)
+        return normalized
+
+    def get(self, schema, sha, query, rules=None, max_errors=None):
+        """ Returns (document, validation errors); query may be None when the client only sent its hash """
+        document = self._documents.get(sha)
+        if document is not None:
+            return document, None
+
+        query = query or self._manifest.get(sha)
+        if query is None:
+            raise PersistedQueryNotFound("PersistedQueryNotFound")
+
+        document = parse(query)
+        errors = validate(schema, document, rules, max_errors)
+        if errors:
+            return document, errors
+
+        self._documents.set(sha, document)
+        return document, None
+
+
+_document_cache = None
+_document_cache_lock = threading.Lock()
+
+
+def get_document_cache():
+    global _document_cache
+    with _document_cache_lock:
+        if _document_cache is None:
+            manifest = {}
+            if settings.GRAPHQL_PERSISTED_QUERIES_MANIFEST:
+                with open(settings.GRAPHQL_PERSISTED_QUERIES_MANIFEST) as manifest_file:
+                    manifest = json.load(manifest_file)
+            _document_cache = DocumentCache(constant.DOCUMENT_CACHE_SIZE, manifest)
+        return _document_cache
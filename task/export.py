@@ -0,0 +1,160 @@
+import csv
+import json
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from jira_board.routers import read_from_replica
+from resources.all_purpose import constant
+from task import bulk, models
+
+EXPORTS = {
+    "tasks": (models.Task.objects, {
+        "id": "id",
+        "name": "name",
+        "description": "description",
+        "task_type": "task_type",
+        "is_completed": "is_completed",
+        "epic_id": "epic_id",
+        "epic_name": "epic__name",
+        "parent_task_id": "parent_task_id",
+        "owner_id": "owner_id",
+        "owner_user_name": "owner__user_name",
+        "assignee_id": "assignee_id",
+        "assignee_user_name": "assignee__user_name",
+        "created_at": "created_at",
+        "updated_at": "updated_at"
+    }),
+    # deleted comments are exported with is_deleted set, for reports that need them
+    "comments": (models.Comment.all_objects, {
+        "id": "id",
+        "comment": "comment",
+        "is_deleted": "is_deleted",
+        "task_id": "task_id",
+        "task_name": "task__name",
+        "epic_id": "task__epic_id",
+        "epic_name": "task__epic__name",
+        "user_id": "user_id",
+        "user_user_name": "user__user_name",
+        "created_at": "created_at",
+        "updated_at": "updated_at"
+    })
+}
+EPIC_FIELD = {"tasks": "epic_id", "comments": "task__epic_id"}
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def export_rows(kind, epic_id=None, updated_since=None, updated_before=None):
+    """ Tuples of one table in EXPORTS column order, related names joined in, never instantiating models """
+    if kind not in EXPORTS:
+        raise ExportError(f"Unknown export {kind!r}; choose from {sorted(EXPORTS)}.")
+    manager, columns = EXPORTS[kind]
+
+    queryset = manager.all()
+    if epic_id is not None:
+        queryset = queryset.filter(**{EPIC_FIELD[kind]: epic_id})
+    if updated_since is not None:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    if updated_before is not None:
+        queryset = queryset.filter(updated_at__lt=updated_before)
+    return queryset.values_list(*columns.values()).order_by("id")
+
+
+def parse_filter_id(value, name):
+    if value in (None, ""):
+        return None
+    parsed = bulk.parse_id(value)
+    if parsed is None:
+        raise ExportError(f"{name} must be an integer id.")
+    return parsed
+
+
+def parse_bound(value, name):
+    if value in (None, ""):
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ExportError(f"{name} must be an ISO 8601 datetime.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Echo:
+    """ File-like object whose write returns the line instead of buffering it, for csv.writer """
+
+    def write(self, value):
+        return value
+
+
+class Formatter:
+    """ Turns export rows into lines of NDJSON or CSV, the CSV header first """
+
+    def __init__(self, kind, output_format):
+        if output_format not in FORMATS:
+            raise ExportError(f"Unknown format {output_format!r}; choose from {sorted(FORMATS)}.")
+        self.columns = list(EXPORTS[kind][1])
+        self.output_format = output_format
+        self.writer = csv.writer(Echo())
+
+    def header(self):
+        if self.output_format == "csv":
+            return [self.writer.writerow(self.columns)]
+        return []
+
+    def line(self, row):
+        if self.output_format == "csv":
+            return self.writer.writerow(row)
+        return json.dumps(dict(zip(self.columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+class Blocks:
+    """ Collects lines until EXPORT_WRITE_SIZE characters, so the server is not handed one tiny write per row """
+
+    def __init__(self, lines):
+        self.lines = list(lines)
+        self.size = sum(map(len, self.lines))
+
+    def add(self, line):
+        self.lines.append(line)
+        self.size += len(line)
+        if self.size >= constant.EXPORT_WRITE_SIZE:
+            return self.flush()
+        return None
+
+    def flush(self):
+        block = "".join(self.lines)
+        self.lines, self.size = [], 0
+        return block
+
+
+def stream(formatter, rows, chunk_size=constant.EXPORT_CHUNK_SIZE):
+    """ Yields the export block by block; with PostgreSQL the rows come from a server-side cursor """
+    with read_from_replica():
+        blocks = Blocks(formatter.header())
+        for row in rows.iterator(chunk_size=chunk_size):
+            block = blocks.add(formatter.line(row))
+            if block:
+                yield block
+        if blocks.lines:
+            yield blocks.flush()
+
+
+async def astream(formatter, rows, chunk_size=constant.EXPORT_CHUNK_SIZE):
+    """ stream() for ASGI, where a synchronous iterator would be read into memory before sending """
+    with read_from_replica():
+        blocks = Blocks(formatter.header())
+        # QuerySet.aiterator opens the cursor of a values_list() in the event loop, so fetch each chunk in a thread
+        iterator = rows.iterator(chunk_size=chunk_size)
+        while chunk := await sync_to_async(list)(islice(iterator, chunk_size)):
+            for row in chunk:
+                block = blocks.add(formatter.line(row))
+                if block:
+                    yield block
+        if blocks.lines:
+            yield blocks.flush()
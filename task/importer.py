@@ -0,0 +1,383 @@
+import csv
+import json
+import time
+from abc import ABC, abstractmethod
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from resources.all_purpose import constant
+from task import models
+from task.documents import LRUCache
+from task.response_cache import invalidate_instances
+
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+
+
+class RowError(Exception):
+    pass
+
+
+def read_rows(path, file_format):
+    """ Yields (line, row, error) from a CSV file with a header or from JSON Lines, one row at a time """
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        if file_format == "csv":
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row, None
+            return
+
+        for line, text in enumerate(source, 1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as e:
+                yield line, text.rstrip("\n"), f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line, row, "Expected a JSON object"
+                continue
+            yield line, row, None
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def text(row, column, required=True):
+    value = row.get(column)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f"{column} is required")
+    return value
+
+
+def secret(row, column):
+    """ The cell exactly as written: surrounding spaces are part of a password """
+    value = row.get(column)
+    if value is None or value == "":
+        raise RowError(f"{column} is required")
+    return str(value)
+
+
+def flag(row, column):
+    value = row.get(column)
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+
+class ImportReport:
+    def __init__(self, kind):
+        self.kind = kind
+        self.read = 0
+        self.created = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __str__(self):
+        rate = self.read / self.elapsed if self.elapsed else 0
+        return (
+            f"{self.kind}: {self.read} read, {self.created} created, {self.rejected} rejected "
+            f"in {self.elapsed:.2f}s ({rate:.0f} rows/s)"
+        )
+
+
+class Importer(ABC):
+    """ Validates a chunk against in-memory maps, then bulk-creates its valid rows in one transaction """
+
+    kind = None
+    model = None
+
+    def __init__(self, rejects, batch_size=constant.IMPORT_BATCH_SIZE):
+        self.rejects = rejects
+        self.batch_size = batch_size
+        self.report = ImportReport(self.kind)
+
+    def reject(self, line, row, error):
+        self.report.rejected += 1
+        if self.rejects is not None:
+            self.rejects.write(json.dumps({"kind": self.kind, "line": line, "error": error, "row": row}) + "\n")
+
+    def run(self, rows, chunk_size=constant.IMPORT_CHUNK_SIZE, progress=None):
+        for chunk in chunked(rows, chunk_size):
+            self.report.read += len(chunk)
+            valid = []
+            for line, row, error in chunk:
+                if error is not None:
+                    self.reject(line, row, error)
+                else:
+                    valid.append((line, row))
+            self.import_chunk(valid)
+            if progress is not None:
+                progress(self.report)
+        return self.report
+
+    @abstractmethod
+    def build(self, valid):
+        """ Returns [(line, row, instance)] for the rows that passed validation, rejecting the others """
+
+    def import_chunk(self, valid):
+        pending = self.build(valid)
+        if not pending:
+            return
+        try:
+            with transaction.atomic():
+                created = self.create(pending)
+                invalidate_instances(created)
+        except DatabaseError as e:
+            # a concurrent writer took a unique value; report the chunk instead of stopping the import
+            for line, row, *_ in pending:
+                self.reject(line, row, f"Chunk rolled back: {e}")
+            self.forget(pending)
+            return
+        self.report.created += len(created)
+
+    def create(self, pending):
+        return self.model.objects.bulk_create([instance for _, _, instance in pending], batch_size=self.batch_size)
+
+    def forget(self, pending):
+        """ Drops map entries of rows whose transaction rolled back """
+
+
+class UserImporter(Importer):
+    kind = "users"
+    model = models.JiraUser
+
+    def __init__(self, rejects, hasher, batch_size=constant.IMPORT_BATCH_SIZE):
+        super().__init__(rejects, batch_size)
+        self.hasher = hasher
+
+    def build(self, valid):
+        candidates = []
+        for line, row in valid:
+            try:
+                user = models.JiraUser(
+                    first_name=text(row, "first_name"),
+                    last_name=text(row, "last_name"),
+                    user_name=text(row, "user_name"),
+                    email=text(row, "email"),
+                    mobile_number=text(row, "mobile_number"),
+                    role=text(row, "role", required=False) or models.JiraUser._meta.get_field("role").default
+                )
+                password = secret(row, "password")
+                user.validate_values()
+            except RowError as e:
+                self.reject(line, row, str(e))
+                continue
+            except ValidationError as e:
+                self.reject(line, row, " ".join(e.messages))
+                continue
+            candidates.append((line, row, user, password))
+
+        # one query for every unique value of the chunk, instead of validate_unique_fields per row
+        taken = {field: set() for field in models.JiraUser.UNIQUE_FIELD_ERRORS}
+        lookup = Q()
+        for field in taken:
+            lookup |= Q(**{f"{field}__in": [getattr(user, field) for _, _, user, _ in candidates]})
+        if candidates:
+            for values in models.JiraUser.objects.filter(lookup).values(*taken):
+                for field, value in values.items():
+                    taken[field].add(value)
+
+        accepted = []
+        for line, row, user, password in candidates:
+            clash = next((field for field in taken if getattr(user, field) in taken[field]), None)
+            if clash is not None:
+                self.reject(line, row, models.JiraUser.UNIQUE_FIELD_ERRORS[clash])
+                continue
+            for field in taken:
+                taken[field].add(getattr(user, field))
+            accepted.append((line, row, user, password))
+
+        # bcrypt dominates user imports, so the whole chunk is hashed on the worker pool at once
+        hashes = self.hasher.hash_many([password for _, _, _, password in accepted])
+        pending = []
+        for (line, row, user, _), hashed in zip(accepted, hashes):
+            user.password = hashed
+            pending.append((line, row, user))
+        return pending
+
+
+class NameMap:
+    """ Bounded map from natural keys to ids; misses are resolved for a whole chunk in one query """
+
+    def __init__(self, size=constant.IMPORT_MAP_SIZE):
+        self._ids = LRUCache(size)
+
+    def get(self, key):
+        return self._ids.get(key)
+
+    def set(self, key, pk):
+        self._ids.set(key, pk)
+
+    def delete(self, key):
+        self._ids.delete(key)
+
+    def resolve(self, keys, fetch):
+        """ Looks up the keys missing from the map with fetch(missing) -> iterable of (key, id) """
+        missing = {key for key in keys if key and self._ids.get(key) is None}
+        if missing:
+            for key, pk in fetch(missing):
+                self._ids.set(key, pk)
+
+
+def users_by_name(names):
+    return models.JiraUser.objects.filter(user_name__in=names).values_list("user_name", "id")
+
+
+class EpicImporter(Importer):
+    kind = "epics"
+    model = models.Epic
+
+    def __init__(self, rejects, users, epics, batch_size=constant.IMPORT_BATCH_SIZE):
+        super().__init__(rejects, batch_size)
+        self.users = users
+        self.epics = epics
+
+    def build(self, valid):
+        self.users.resolve({text(row, "user_name", False) for _, row in valid}, users_by_name)
+        self.epics.resolve(
+            {text(row, "name", False) for _, row in valid},
+            lambda names: models.Epic.objects.filter(name__in=names).values_list("name", "id")
+        )
+
+        pending = []
+        for line, row in valid:
+            try:
+                name = text(row, "name")
+                user_id = self.users.get(text(row, "user_name"))
+                if user_id is None:
+                    raise RowError("User does not exist")
+                if self.epics.get(name) is not None:
+                    raise RowError("Epic already exists")
+                epic = models.Epic(name=name, user_id=user_id, is_completed=flag(row, "is_completed"))
+                epic.clean()
+            except RowError as e:
+                self.reject(line, row, str(e))
+                continue
+            except ValidationError as e:
+                self.reject(line, row, " ".join(e.messages))
+                continue
+            # claimed now so a duplicate later in the chunk is rejected; the id is filled in after the insert
+            self.epics.set(name, 0)
+            pending.append((line, row, epic))
+        return pending
+
+    def create(self, pending):
+        created = super().create(pending)
+        for epic in created:
+            self.epics.set(epic.name, epic.pk)
+        return created
+
+    def forget(self, pending):
+        for _, _, epic in pending:
+            self.epics.delete(epic.name)
+
+
+class TaskImporter(Importer):
+    """ Parents are matched by name within the task's epic and must come before their subtasks """
+
+    kind = "tasks"
+    model = models.Task
+
+    def __init__(self, rejects, users, epics, tasks, batch_size=constant.IMPORT_BATCH_SIZE):
+        super().__init__(rejects, batch_size)
+        self.users = users
+        self.epics = epics
+        self.tasks = tasks
+
+    def build(self, valid):
+        self.users.resolve(
+            {text(row, column, False) for _, row in valid for column in ("owner_user_name", "assignee_user_name")},
+            users_by_name
+        )
+        self.epics.resolve(
+            {text(row, "epic_name", False) for _, row in valid},
+            lambda names: models.Epic.objects.filter(name__in=names).values_list("name", "id")
+        )
+        epic_ids = {self.epics.get(text(row, "epic_name", False)) for _, row in valid} - {None}
+        names = {text(row, column, False) for _, row in valid for column in ("name", "parent_task_name")}
+        self.tasks.resolve(
+            {(epic_id, name) for epic_id in epic_ids for name in names if name},
+            lambda keys: (
+                ((epic_id, name), pk) for epic_id, name, pk in models.Task.objects.filter(
+                    epic_id__in={key[0] for key in keys}, name__in={key[1] for key in keys}
+                ).values_list("epic_id", "name", "id")
+            )
+        )
+
+        pending = []
+        for line, row in valid:
+            try:
+                name = text(row, "name")
+                epic_id = self.epics.get(text(row, "epic_name"))
+                if epic_id is None:
+                    raise RowError("Epic does not exist")
+                owner_id = self.users.get(text(row, "owner_user_name"))
+                assignee_id = self.users.get(text(row, "assignee_user_name"))
+                if owner_id is None or assignee_id is None:
+                    raise RowError("User does not exist")
+                if self.tasks.get((epic_id, name)) is not None:
+                    raise RowError("Task already exists in this epic")
+                parent_name = text(row, "parent_task_name", False)
+                if parent_name and self.tasks.get((epic_id, parent_name)) is None:
+                    raise RowError("Parent Task does not exist")
+
+                task = models.Task(
+                    name=name,
+                    description=text(row, "description", False),
+                    epic_id=epic_id,
+                    owner_id=owner_id,
+                    assignee_id=assignee_id,
+                    task_type=text(row, "task_type", False) or models.Task._meta.get_field("task_type").default,
+                    is_completed=flag(row, "is_completed")
+                )
+                task.clean()
+            except RowError as e:
+                self.reject(line, row, str(e))
+                continue
+            except ValidationError as e:
+                self.reject(line, row, " ".join(e.messages))
+                continue
+            # 0 marks a task of this chunk that has no id yet; its subtasks wait for the insert
+            self.tasks.set((epic_id, name), 0)
+            pending.append((line, row, task, parent_name))
+        return pending
+
+    def create(self, pending):
+        """ Inserts the chunk level by level, so subtasks can reference parents created in the same chunk """
+        created = []
+        waiting = pending
+        while waiting:
+            ready, blocked = [], []
+            for item in waiting:
+                _, _, task, parent_name = item
+                if parent_name:
+                    task.parent_task_id = self.tasks.get((task.epic_id, parent_name))
+                (blocked if parent_name and not task.parent_task_id else ready).append(item)
+            if not ready:
+                # only possible when the map evicted a parent of this chunk before it was inserted
+                for line, row, task, _ in blocked:
+                    self.reject(line, row, "Parent Task does not exist")
+                    self.tasks.delete((task.epic_id, task.name))
+                break
+            waiting = blocked
+            level = models.Task.objects.bulk_create([item[2] for item in ready], batch_size=self.batch_size)
+            for task in level:
+                self.tasks.set((task.epic_id, task.name), task.pk)
+            created += level
+        # bulk_create skips Task.save, which keeps the counters
+        models.Epic.refresh_counters({task.epic_id for task in created})
+        return created
+
+    def forget(self, pending):
+        for _, _, task, _ in pending:
+            self.tasks.delete((task.epic_id, task.name))
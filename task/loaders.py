@@ -0,0 +1,228 @@
+import asyncio
+from collections import defaultdict
+from django.db.models import Count
+from graphql import GraphQLError
+from task import models
+from task.optimizer import first_per_parent
+
+
+class BatchLoader:
+    """ Per-request loader: every key primed so far is fetched together on the first cache miss """
+
+    def __init__(self, query, assemble, many=False, default=None, is_async=False):
+        self.query = query
+        self.assemble = assemble
+        self.many = many
+        self.default = default
+        self.is_async = is_async
+        self._cache = {}
+        self._pending = set()
+        self._inflight = {}
+
+    def _missing(self):
+        return [] if self.many else self.default
+
+    def _take_batch(self, key):
+        keys = self._pending | {key}
+        self._pending = set()
+        return keys
+
+    def _store(self, keys, rows):
+        results = self.assemble(rows)
+        for batch_key in keys:
+            self._cache[batch_key] = results.get(batch_key, self._missing())
+
+    def prime(self, keys):
+        for key in keys:
+            if key is not None and key not in self._cache and key not in self._inflight:
+                self._pending.add(key)
+
+    def put(self, key, value):
+        self._cache[key] = value
+        self._pending.discard(key)
+
+    def load(self, key):
+        """ Returns the value, or an awaitable of it when the request runs on the async executor """
+        if self.is_async:
+            return self.aload(key)
+        if key is None:
+            return self._missing()
+
+        if key not in self._cache:
+            keys = self._take_batch(key)
+            self._store(keys, list(self.query(list(keys))))
+
+        return self._cache[key]
+
+    async def aload(self, key):
+        if key is None:
+            return self._missing()
+
+        if key not in self._cache:
+            # sibling resolvers run concurrently; they share the batch already in flight
+            batch = self._inflight.get(key)
+            if batch is None:
+                keys = self._take_batch(key)
+                batch = asyncio.ensure_future(self._afetch(keys))
+                for batch_key in keys:
+                    self._inflight[batch_key] = batch
+            await batch
+
+        return self._cache[key]
+
+    async def _afetch(self, keys):
+        try:
+            rows = [row async for row in self.query(list(keys))]
+            self._store(keys, rows)
+        finally:
+            for batch_key in keys:
+                self._inflight.pop(batch_key, None)
+
+
+def group_by(rows, attname):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[getattr(row, attname)].append(row)
+    return grouped
+
+
+class Loaders:
+    """ All loaders of one GraphQL request; rows fetched by any of them prime the others """
+
+    def __init__(self, is_async=False):
+        self.is_async = is_async
+        self.users = self._by_pk(models.JiraUser)
+        self.epics = self._by_pk(models.Epic)
+        self.tasks = self._by_pk(models.Task)
+        self.comments = self._by_pk(models.Comment)
+        self.epics_by_user = self._grouped(models.Epic, "user_id")
+        self.tasks_by_epic = self._grouped(models.Task, "epic_id")
+        self.subtasks_by_parent = self._grouped(models.Task, "parent_task_id")
+        self.comments_by_task = self._grouped(models.Comment, "task_id")
+        self.comment_counts = BatchLoader(
+            lambda keys: (
+                models.Comment.objects.filter(task_id__in=keys)
+                .values("task_id").annotate(count=Count("id")).order_by()
+            ),
+            lambda rows: {row["task_id"]: row["count"] for row in rows},
+            default=0,
+            is_async=self.is_async
+        )
+
+    def _by_pk(self, model):
+        def assemble(rows):
+            self.prime(rows)
+            return {row.pk: row for row in rows}
+
+        return BatchLoader(
+            lambda keys: model.objects.filter(pk__in=keys),
+            assemble,
+            is_async=self.is_async
+        )
+
+    def _grouped(self, model, attname):
+        def assemble(rows):
+            self.prime(rows)
+            return group_by(rows, attname)
+
+        return BatchLoader(
+            lambda keys: first_per_parent(model.objects.filter(**{f"{attname}__in": keys}), attname),
+            assemble,
+            many=True,
+            is_async=self.is_async
+        )
+
+    def prime(self, instances):
+        """ Registers the relation keys of resolved rows so the next nesting level loads in one batch """
+        for instance in instances:
+            # children prefetched for the whole page join the batch now, not only once their own parent resolves
+            for children in getattr(instance, "_prefetched_objects_cache", {}).values():
+                self.prime(children)
+            # rows narrowed with only() must not answer later by-pk lookups that may want other columns
+            complete = not instance.get_deferred_fields()
+            if isinstance(instance, models.Task):
+                if complete:
+                    self.tasks.put(instance.pk, instance)
+                self.epics.prime([instance.epic_id])
+                self.users.prime([instance.owner_id, instance.assignee_id])
+                self.tasks.prime([instance.parent_task_id])
+                self.subtasks_by_parent.prime([instance.pk])
+                self.comments_by_task.prime([instance.pk])
+                self.comment_counts.prime([instance.pk])
+            elif isinstance(instance, models.Epic):
+                if complete:
+                    self.epics.put(instance.pk, instance)
+                self.users.prime([instance.user_id])
+                self.tasks_by_epic.prime([instance.pk])
+            elif isinstance(instance, models.JiraUser):
+                if complete:
+                    self.users.put(instance.pk, instance)
+                self.epics_by_user.prime([instance.pk])
+            elif isinstance(instance, models.Comment):
+                if complete:
+                    self.comments.put(instance.pk, instance)
+                self.tasks.prime([instance.task_id])
+                self.users.prime([instance.user_id])
+        return instances
+
+
+def get_loaders(info):
+    """ Returns the loaders bound to the current request, creating them on first use """
+    context = info.context
+    if context is None:
+        return Loaders()
+
+    loaders = getattr(context, "board_loaders", None)
+    if loaders is None:
+        loaders = Loaders()
+        context.board_loaders = loaders
+    return loaders
+
+
+def reset_loaders(info):
+    """ Starts an empty batch, so every event of a subscription resolves against current rows """
+    info.context.board_loaders = Loaders(is_async=True)
+
+
+def load_relation(info, instance, name, loader_name, key, size=None):
+    """ Returns a relation already fetched by select_related/prefetch_related, otherwise loads it in batch """
+    loaders = get_loaders(info)
+    if name in getattr(instance, "_prefetched_objects_cache", {}):
+        return loaders.prime(list(getattr(instance, name).all())[:size])
+
+    field = instance._meta.get_field(name)
+    if field.concrete and field.is_cached(instance):
+        value = getattr(instance, name)
+        if value is not None:
+            loaders.prime([value])
+        return value
+
+    value = getattr(loaders, loader_name).load(key)
+    if size is None:
+        return value
+    if loaders.is_async:
+        return _aslice(value, size)
+    return value[:size]
+
+
+async def _aslice(value, size):
+    return (await value)[:size]
+
+
+def get_one(info, queryset, pk, message):
+    """ Fetches a single row for a root field, awaiting it through the async ORM on the async executor """
+    loaders = get_loaders(info)
+    if loaders.is_async:
+        return _aget_one(loaders, queryset, pk, message)
+
+    try:
+        return loaders.prime([queryset.get(pk=pk)])[0]
+    except queryset.model.DoesNotExist:
+        raise GraphQLError(message)
+
+
+async def _aget_one(loaders, queryset, pk, message):
+    try:
+        return loaders.prime([await queryset.aget(pk=pk)])[0]
+    except queryset.model.DoesNotExist:
+        raise GraphQLError(message)
@@ -0,0 +1,71 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test import Client
+from task.bench.runner import percentile
+from task.profiling import connections_opened, pool_stats
+
+QUERY = "{ user(id: 1) { userName } }"
+
+
+class Command(BaseCommand):
+    help = "Compares a new database connection per request against the configured reuse (persistent or pooled)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+
+    def handle(self, *args, **options):
+        configured = (connection.settings_dict["CONN_MAX_AGE"], dict(connection.settings_dict["OPTIONS"]))
+        pooled = bool(configured[1].get("pool"))
+        unpooled_options = {key: value for key, value in configured[1].items() if key != "pool"}
+        client = Client()
+        # every request must reach the database
+        settings.GRAPHQL_RESPONSE_CACHE_BACKEND = ""
+
+        modes = [("per-request", 0, unpooled_options)]
+        if pooled:
+            modes.append(("pool", *configured))
+        elif configured[0] != 0:
+            modes.append((f"persistent {configured[0]}s", *configured))
+        else:
+            self.stderr.write("CONN_MAX_AGE is 0 and no pool is configured; only the baseline runs.")
+
+        try:
+            for label, max_age, database_options in modes:
+                connection.close()
+                connection.settings_dict["CONN_MAX_AGE"] = max_age
+                connection.settings_dict["OPTIONS"] = database_options
+                self.report(label, client, options["requests"])
+        finally:
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"], connection.settings_dict["OPTIONS"] = configured
+
+    def report(self, label, client, count):
+        opened_before = connections_opened(connection.alias)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(count):
+            request_started = time.perf_counter()
+            # the test client skips the connection handling of request_started/request_finished; mirror it
+            close_old_connections()
+            response = client.post("/graphql/", {"query": QUERY}, content_type="application/json")
+            close_old_connections()
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            if response.status_code != 200:
+                self.stderr.write(response.content.decode())
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{label:<16} {count / elapsed:8.1f} req/s  "
+            f"mean {sum(latencies) / len(latencies):6.2f}ms  "
+            f"p95 {percentile(latencies, 0.95):6.2f}ms  "
+            f"connects {connections_opened(connection.alias) - opened_before}"
+        )
+        stats = pool_stats().get(connection.alias)
+        if stats:
+            # with a pool, connects above are checkouts; physical connections are counted by the pool
+            self.stdout.write(
+                f"{'':<16} pool connections {stats.get('connections_num', 0)}, "
+                f"waited {stats.get('requests_wait_ms', 0)}ms over {stats.get('requests_queued', 0)} queued requests"
+            )
@@ -0,0 +1,62 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from resources.all_purpose import constant
+from task.bench.catalogue import OPERATIONS
+from task.bench.runner import check, run
+
+
+class Command(BaseCommand):
+    help = "Runs the benchmark catalogue against /graphql/ in-process and reports latency, throughput and SQL counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("operations", nargs="*", help="Catalogue entries to run (default: all)")
+        parser.add_argument("--iterations", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--no-mutations", action="store_true", help="Leave the data untouched")
+        parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+        parser.add_argument("--save", help="Write the report to this JSON file, for use as a baseline")
+        parser.add_argument("--baseline", help="Fail when a report regresses against this saved JSON file")
+        parser.add_argument("--tolerance", type=float, default=constant.BENCH_LATENCY_TOLERANCE,
+                            help="Allowed p95 growth over the baseline, as a fraction")
+
+    def handle(self, *args, **options):
+        operations = [
+            operation for operation in OPERATIONS
+            if (not options["operations"] or operation.name in options["operations"])
+            and not (options["no_mutations"] and operation.mutation)
+        ]
+        unknown = set(options["operations"]) - {operation.name for operation in OPERATIONS}
+        if unknown:
+            raise CommandError(f"Unknown operations: {', '.join(sorted(unknown))}")
+
+        if not options["cache"]:
+            # measure the resolvers, not cache hits
+            settings.GRAPHQL_RESPONSE_CACHE_BACKEND = ""
+
+        try:
+            reports = run(operations, options["iterations"], options["warmup"])
+        except LookupError as e:
+            raise CommandError(f"{e} Run seed_board.")
+
+        self.stdout.write(f"{'operation':<20} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>5} {'fail':>5}")
+        for report in reports:
+            self.stdout.write(
+                f"{report['operation']:<20} {report['rps']:8.1f} {report['p50']:7.2f}ms "
+                f"{report['p95']:6.2f}ms {report['p99']:6.2f}ms {report['queries']:5d} {report['failures']:5d}"
+            )
+
+        if options["save"]:
+            with open(options["save"], "w") as report_file:
+                json.dump(reports, report_file, indent=2)
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        problems = check(reports, operations, baseline, options["tolerance"])
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError(f"{len(problems)} benchmark regressions")
@@ -0,0 +1,80 @@
+import asyncio
+import itertools
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncRequestFactory, override_settings
+from resources.all_purpose.hashing import hasher
+from task import models
+from task.bench.runner import percentile
+from task.views import AsyncGraphQLView
+
+CREATE_USER = """
+mutation CreateUser($userName: String!, $email: String!, $mobileNumber: String!) {
+  createUser(firstName: "Bench", lastName: "User", userName: $userName, email: $email,
+             password: "bench-password", mobileNumber: $mobileNumber, role: "developer") {
+    success
+    message
+  }
+}
+"""
+
+# label -> GRAPHQL_ASYNC_MUTATIONS: before, createUser shares the sync mutation thread; after, it awaits the pool
+MODES = (("sync thread", []), ("hash pool", ["createUser"]))
+
+_sequence = itertools.count()
+
+
+class Command(BaseCommand):
+    help = "Runs concurrent createUser mutations through the ASGI view, hashing on the sync thread and on the pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=64, help="createUser mutations per mode")
+        parser.add_argument("--concurrency", type=int, default=16)
+
+    def handle(self, *args, **options):
+        prefix = f"bench-hash-{int(time.time())}"
+        view = AsyncGraphQLView.as_view()
+        try:
+            for label, async_mutations in MODES:
+                with override_settings(GRAPHQL_ASYNC_MUTATIONS=async_mutations):
+                    report = asyncio.run(self.run(view, prefix, options["requests"], options["concurrency"]))
+                self.stdout.write(
+                    f"{label:<12} {report['rps']:8.1f} req/s  p50 {report['p50']:7.1f}ms  "
+                    f"p99 {report['p99']:7.1f}ms  failures {report['failures']}"
+                )
+        finally:
+            hasher.shutdown()
+            models.JiraUser.objects.filter(user_name__startswith=prefix).delete()
+
+    async def run(self, view, prefix, requests, concurrency):
+        factory = AsyncRequestFactory()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def create_user():
+            index = next(_sequence)
+            body = json.dumps({"query": CREATE_USER, "variables": {
+                "userName": f"{prefix}-{index}",
+                "email": f"{prefix}-{index}@example.com",
+                "mobileNumber": f"7{index:09d}"
+            }})
+            async with slots:
+                started = time.perf_counter()
+                response = await view(factory.post("/graphql/", body, content_type="application/json"))
+                elapsed = time.perf_counter() - started
+            payload = json.loads(response.content)
+            return elapsed, response.status_code == 200 and ((payload.get("data") or {}).get("createUser") or {}).get("success")
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(create_user() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        if not any(ok for _, ok in results):
+            raise CommandError("Every createUser failed; run migrate on the benchmark database first.")
+
+        latencies = [latency * 1000 for latency, _ in results]
+        return {
+            "rps": len(results) / elapsed,
+            "p50": percentile(latencies, 0.50),
+            "p99": percentile(latencies, 0.99),
+            "failures": sum(1 for _, ok in results if not ok)
+        }
@@ -0,0 +1,51 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from resources.all_purpose import constant
+from task.bench.startup import PHASES
+
+
+class Command(BaseCommand):
+    help = "Boots fresh interpreters and reports how long each startup phase takes, failing over the budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=constant.BENCH_STARTUP_RUNS)
+        parser.add_argument("--budget", type=float, default=constant.BENCH_STARTUP_BUDGET,
+                            help="Allowed median seconds until the first request is answered")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE))
+        samples = []
+        for _ in range(options["runs"]):
+            probe = subprocess.run(
+                [sys.executable, "-m", "task.bench.startup"],
+                capture_output=True, text=True, env=env, cwd=settings.BASE_DIR
+            )
+            if probe.returncode:
+                raise CommandError(f"Startup probe failed:\n{probe.stderr}")
+            samples.append(json.loads(probe.stdout.strip().splitlines()[-1]))
+
+        self.stdout.write(f"{'phase':<15} {'median':>9} {'max':>9}")
+        for phase in PHASES + ("total",):
+            values = [sample["timings"][phase] * 1000 for sample in samples]
+            self.stdout.write(f"{phase:<15} {statistics.median(values):7.1f}ms {max(values):7.1f}ms")
+        self.stdout.write(f"modules loaded: {samples[-1]['modules']}, schemas built: {samples[-1]['schemas']}")
+
+        problems = []
+        total = statistics.median(sample["timings"]["total"] for sample in samples)
+        if total > options["budget"]:
+            problems.append(f"startup took {total:.2f}s, over the {options['budget']:.2f}s budget")
+        if any(sample["status"] != 200 for sample in samples):
+            problems.append("the first /graphql/ request did not answer 200")
+        if any(sample["built_at_boot"] for sample in samples):
+            problems.append("the schema was built while Django booted, before it was first used")
+        if any(sample["schemas"] != 1 for sample in samples):
+            problems.append(f"{samples[-1]['schemas']} graphene schemas were built, expected 1")
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError(f"{len(problems)} startup problems")
@@ -0,0 +1,47 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from resources.all_purpose import constant
+from task.export import EXPORTS, FORMATS, ExportError, Formatter, export_rows, parse_bound, stream
+
+
+class Command(BaseCommand):
+    help = "Streams the tasks or comments table as NDJSON or CSV with constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+        parser.add_argument("--output", help="File to write; standard output when omitted")
+        parser.add_argument("--epic", type=int, help="Only rows of this epic")
+        parser.add_argument("--since", help="Only rows updated at or after this ISO 8601 datetime")
+        parser.add_argument("--until", help="Only rows updated before this ISO 8601 datetime")
+        parser.add_argument("--chunk-size", type=int, default=constant.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            formatter = Formatter(options["kind"], options["format"])
+            rows = export_rows(
+                options["kind"],
+                epic_id=options["epic"],
+                updated_since=parse_bound(options["since"], "--since"),
+                updated_before=parse_bound(options["until"], "--until")
+            )
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        output = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else sys.stdout
+        written = 0
+        try:
+            for block in stream(formatter, rows, options["chunk_size"]):
+                output.write(block)
+                written += len(block)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        if options["output"]:
+            self.stderr.write(
+                f"Wrote {written} characters of {options['kind']} to {options['output']} "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
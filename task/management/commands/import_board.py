@@ -0,0 +1,66 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from resources.all_purpose import constant
+from resources.all_purpose.hashing import PasswordHasher
+from task.importer import EpicImporter, NameMap, TaskImporter, UserImporter, read_rows
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+class Command(BaseCommand):
+    help = "Bulk-loads users, epics and tasks from CSV or JSON Lines files, writing rejected rows to a file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", help="first_name,last_name,user_name,email,password,mobile_number,role")
+        parser.add_argument("--epics", help="name,user_name,is_completed")
+        parser.add_argument(
+            "--tasks",
+            help="name,description,epic_name,owner_user_name,assignee_user_name,task_type,parent_task_name,"
+                 "is_completed; parents must come before their subtasks"
+        )
+        parser.add_argument("--rejects", default="import_rejects.jsonl", help="JSON Lines file of rejected rows")
+        parser.add_argument("--chunk-size", type=int, default=constant.IMPORT_CHUNK_SIZE)
+        parser.add_argument("--batch-size", type=int, default=constant.IMPORT_BATCH_SIZE)
+        parser.add_argument("--hash-workers", type=int, default=constant.BCRYPT_WORKERS)
+
+    def handle(self, *args, **options):
+        files = [(kind, options[kind]) for kind in ("users", "epics", "tasks") if options[kind]]
+        if not files:
+            raise CommandError("Pass at least one of --users, --epics and --tasks.")
+        for kind, path in files:
+            if not os.path.isfile(path):
+                raise CommandError(f"{path} does not exist.")
+            if os.path.splitext(path)[1].lower() not in FORMATS:
+                raise CommandError(f"{path}: use a .csv, .jsonl or .ndjson file.")
+
+        chunk_size = options["chunk_size"]
+        batch_size = options["batch_size"]
+        # every password of a chunk may be queued at once; this process does nothing else meanwhile
+        hasher = PasswordHasher(workers=options["hash_workers"], max_pending=chunk_size, queue_timeout=None)
+        users, epics, tasks = NameMap(), NameMap(), NameMap()
+        rejected = 0
+
+        with open(options["rejects"], "w", encoding="utf-8") as rejects:
+            try:
+                for kind, path in files:
+                    if kind == "users":
+                        importer = UserImporter(rejects, hasher, batch_size)
+                    elif kind == "epics":
+                        importer = EpicImporter(rejects, users, epics, batch_size)
+                    else:
+                        importer = TaskImporter(rejects, users, epics, tasks, batch_size)
+
+                    rows = read_rows(path, FORMATS[os.path.splitext(path)[1].lower()])
+                    report = importer.run(rows, chunk_size, self.progress if options["verbosity"] > 1 else None)
+                    rejected += report.rejected
+                    self.stdout.write(self.style.SUCCESS(str(report)))
+            finally:
+                hasher.shutdown()
+
+        if rejected:
+            self.stdout.write(self.style.WARNING(f"{rejected} rows rejected, see {options['rejects']}"))
+        else:
+            os.remove(options["rejects"])
+
+    def progress(self, report):
+        self.stderr.write(str(report))
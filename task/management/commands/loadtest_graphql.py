@@ -0,0 +1,61 @@
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from task.bench.runner import percentile
+
+DEFAULT_QUERY = """
+{
+  allEpics(first: 20) {
+    edges { node { name taskCount tasks { name owner { userName } assignee { userName } } } }
+  }
+}
+"""
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        ok = response.status == 200 and b'"errors"' not in response.read()
+    return time.perf_counter() - started, ok
+
+
+class Command(BaseCommand):
+    help = "Load-tests running /graphql/ deployments (e.g. gunicorn WSGI vs uvicorn ASGI) side by side"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "targets", nargs="+", help="label=url pairs, e.g. wsgi=http://127.0.0.1:8000/graphql/"
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--query-file", help="File holding the GraphQL document to send")
+
+    def handle(self, *args, **options):
+        query = DEFAULT_QUERY
+        if options["query_file"]:
+            with open(options["query_file"]) as query_file:
+                query = query_file.read()
+        body = json.dumps({"query": query}).encode("utf-8")
+
+        for target in options["targets"]:
+            label, separator, url = target.partition("=")
+            if not separator:
+                raise CommandError(f"Expected label=url, got {target!r}")
+
+            post(url, body)  # warm up connections and caches
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                results = list(pool.map(lambda _: post(url, body), range(options["requests"])))
+            elapsed = time.perf_counter() - started
+
+            latencies = [latency * 1000 for latency, _ in results]
+            failures = sum(1 for _, ok in results if not ok)
+            self.stdout.write(
+                f"{label:<8} {len(results) / elapsed:8.1f} req/s  "
+                f"p50 {percentile(latencies, 0.50):7.1f}ms  "
+                f"p99 {percentile(latencies, 0.99):7.1f}ms  "
+                f"failures {failures}"
+            )
@@ -0,0 +1,17 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from resources.all_purpose import constant
+from task import models
+
+
+class Command(BaseCommand):
+    help = "Deletes tombstones older than the sync retention; clients with older cursors must resync"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=constant.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        deleted, _ = models.Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones older than {cutoff.isoformat()}"))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+from task import models
+
+
+class Command(BaseCommand):
+    help = "Recomputes the denormalized task counters on every epic, or only reports drift with --verify"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="Report mismatches without writing")
+
+    def handle(self, *args, **options):
+        actual = {
+            row["epic"]: row
+            for row in models.Task.objects.order_by().values("epic").annotate(
+                task_count=Count("id"),
+                completed_task_count=Count("id", filter=Q(is_completed=True)),
+                open_task_count=Count("id", filter=Q(is_completed=False)),
+                subtask_count=Count("id", filter=Q(parent_task__isnull=False))
+            )
+        }
+
+        drifted = []
+        for epic in models.Epic.objects.only("id", *models.Epic.COUNTER_FIELDS).iterator():
+            expected = actual.get(epic.pk, {})
+            for field in models.Epic.COUNTER_FIELDS:
+                if getattr(epic, field) != expected.get(field, 0):
+                    drifted.append(epic.pk)
+                    self.stdout.write(
+                        f"epic {epic.pk}: {field} is {getattr(epic, field)}, expected {expected.get(field, 0)}"
+                    )
+
+        if options["verify"]:
+            if drifted:
+                raise CommandError(f"{len(set(drifted))} epics have drifted counters")
+            self.stdout.write(self.style.SUCCESS("All epic counters are consistent"))
+            return
+
+        with transaction.atomic():
+            updated = models.Epic.refresh_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters on {updated} epics"))
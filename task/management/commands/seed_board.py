@@ -0,0 +1,35 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from task import models
+from task.bench.data import generate
+
+
+class Command(BaseCommand):
+    help = "Fills the database with a reproducible synthetic board for benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--epics", type=int, default=50)
+        parser.add_argument("--tasks-per-epic", type=int, default=40)
+        parser.add_argument("--subtasks-per-task", type=int, default=2)
+        parser.add_argument("--subtask-depth", type=int, default=2, help="Levels of subtasks below each main task")
+        parser.add_argument("--comments-per-task", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--flush", action="store_true", help="Empty the whole database first")
+
+    def handle(self, *args, **options):
+        if options["flush"]:
+            call_command("flush", interactive=False, verbosity=0)
+        elif models.JiraUser.objects.exists():
+            raise CommandError("The database already holds data; pass --flush to replace it.")
+
+        counts = generate(
+            users=options["users"],
+            epics=options["epics"],
+            tasks_per_epic=options["tasks_per_epic"],
+            subtasks_per_task=options["subtasks_per_task"],
+            subtask_depth=options["subtask_depth"],
+            comments_per_task=options["comments_per_task"],
+            seed=options["seed"]
+        )
+        self.stdout.write(", ".join(f"{count} {table}" for table, count in counts.items()))
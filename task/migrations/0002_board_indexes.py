@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-17 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at', 'id'], name='comments_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['task', 'created_at', 'id'], name='comments_live_task_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='epic',
+            index=models.Index(fields=['created_at', 'id'], name='epics_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='epic',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='epics_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jirauser',
+            index=models.Index(fields=['created_at', 'id'], name='jira_users_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jirauser',
+            index=models.Index(fields=['role', 'created_at', 'id'], name='jira_users_role_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='tasks_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['epic', 'is_completed', 'created_at', 'id'], name='tasks_epic_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'is_completed', 'created_at', 'id'], name='tasks_assignee_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['assignee', 'created_at', 'id'], name='tasks_open_assignee_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-17 11:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Epic = apps.get_model('task', 'Epic')
+    Task = apps.get_model('task', 'Task')
+
+    def tally(**filters):
+        tasks = Task.objects.filter(epic=OuterRef('pk'), **filters).order_by().values('epic')
+        return Coalesce(Subquery(tasks.annotate(total=Count('id')).values('total')), Value(0))
+
+    Epic.objects.update(
+        task_count=tally(),
+        completed_task_count=tally(is_completed=True),
+        open_task_count=tally(is_completed=False),
+        subtask_count=tally(parent_task__isnull=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0002_board_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='epic',
+            name='completed_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='epic',
+            name='open_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='epic',
+            name='subtask_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='epic',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
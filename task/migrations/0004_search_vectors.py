@@ -0,0 +1,79 @@
+from django.db import migrations
+
+# the search columns are maintained by triggers, so bulk_create/bulk_update and raw updates keep them current too
+FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE tasks ADD COLUMN search_vector tsvector",
+    "ALTER TABLE comments ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION tasks_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tasks_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON tasks
+    FOR EACH ROW EXECUTE FUNCTION tasks_search_vector_update()
+    """,
+    """
+    CREATE FUNCTION comments_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := to_tsvector('english', coalesce(NEW.comment, ''));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER comments_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF comment ON comments
+    FOR EACH ROW EXECUTE FUNCTION comments_search_vector_update()
+    """,
+    """
+    UPDATE tasks SET search_vector =
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    """,
+    "UPDATE comments SET search_vector = to_tsvector('english', coalesce(comment, ''))",
+    "CREATE INDEX tasks_search_idx ON tasks USING GIN (search_vector)",
+    "CREATE INDEX comments_search_idx ON comments USING GIN (search_vector) WHERE NOT is_deleted",
+    "CREATE INDEX tasks_name_trgm_idx ON tasks USING GIN (name gin_trgm_ops)",
+]
+
+# the exact reverse of FORWARD; pg_trgm stays installed, other databases on the server may rely on it
+BACKWARD = [
+    "DROP INDEX IF EXISTS tasks_name_trgm_idx",
+    "DROP INDEX IF EXISTS comments_search_idx",
+    "DROP INDEX IF EXISTS tasks_search_idx",
+    "DROP TRIGGER IF EXISTS comments_search_vector_trigger ON comments",
+    "DROP FUNCTION IF EXISTS comments_search_vector_update()",
+    "DROP TRIGGER IF EXISTS tasks_search_vector_trigger ON tasks",
+    "DROP FUNCTION IF EXISTS tasks_search_vector_update()",
+    "ALTER TABLE comments DROP COLUMN IF EXISTS search_vector",
+    "ALTER TABLE tasks DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        # other backends fall back to substring search (see task/search.py)
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0003_epic_task_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgresql(FORWARD), run_on_postgresql(BACKWARD)),
+    ]
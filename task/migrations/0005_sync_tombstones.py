@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-17 11:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0004_search_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'tombstones',
+                'managed': True,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated_at', 'id'], name='comments_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='epic',
+            index=models.Index(fields=['updated_at', 'id'], name='epics_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jirauser',
+            index=models.Index(fields=['updated_at', 'id'], name='jira_users_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['updated_at', 'id'], name='tasks_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstones_deleted_id_idx'),
+        ),
+    ]
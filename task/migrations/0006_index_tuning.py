@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-17 12:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0005_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_open_assignee_idx',
+        ),
+        migrations.AlterField(
+            model_name='epic',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='epics', to='task.jirauser'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='assignee',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='assigned_tasks', to='task.jirauser'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='epic',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='task.epic'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['epic', 'created_at', 'id'], name='tasks_epic_created_idx'),
+        ),
+    ]
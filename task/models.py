@@ -1,10 +1,126 @@
-from django.db import models
+import contextlib
+import contextvars
+import copy
+from collections import Counter
+from django.db import connection, models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
+from django.dispatch import Signal
+from django.utils import timezone
+from resources.all_purpose import constant
 from resources.all_purpose.enums import UserRoleTypes, TaskTypeEnum
 from resources.all_purpose.common import email_validator
 
 
-class JiraUser(models.Model):
+class TrackChangesMixin:
+    """ Remembers column values as loaded from the database so saves can tell what changed """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def remember_values(self):
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+    def has_changed(self, attname):
+        loaded = getattr(self, "_loaded_values", None)
+        if self._state.adding or loaded is None:
+            return True
+        if attname in self.get_deferred_fields():
+            return False
+        return loaded.get(attname, models.DEFERRED) != getattr(self, attname)
+
+
+# sent once per delete, cascades included, with copies of every board row it removed
+rows_deleted = Signal()
+
+_delete_batch = contextvars.ContextVar("delete_batch", default=None)
+
+
+class DeleteBatch:
+    """ Collects the rows removed by one delete, cascades included, so their side effects are written once """
+
+    def __init__(self):
+        self.rows = []
+
+    @staticmethod
+    def current():
+        return _delete_batch.get()
+
+    def add(self, instance):
+        # a copy: the collector clears the primary keys once every row is gone
+        self.rows.append(copy.copy(instance))
+
+    def flush(self):
+        if not self.rows:
+            return
+        Tombstone.objects.bulk_create([
+            Tombstone(model=row._meta.label_lower, object_id=row.pk) for row in self.rows
+        ])
+
+        deleted_epics = {row.pk for row in self.rows if isinstance(row, Epic)}
+        deltas = {}
+        for row in self.rows:
+            if not isinstance(row, Task):
+                continue
+            loaded = getattr(row, "_loaded_values", {})
+            epic_id = loaded.get("epic_id", row.epic_id)
+            if epic_id not in deleted_epics:
+                deltas.setdefault(epic_id, Counter()).update(Epic.counter_deltas(
+                    loaded.get("is_completed", row.is_completed),
+                    loaded.get("parent_task_id", row.parent_task_id),
+                    sign=-1
+                ))
+        for epic_id, epic_deltas in deltas.items():
+            Epic.adjust_counters(epic_id, epic_deltas)
+
+        rows_deleted.send(sender=DeleteBatch, rows=self.rows)
+        self.rows = []
+
+
+@contextlib.contextmanager
+def delete_batch(using):
+    """ Runs a delete in one transaction with its batch; nested deletes join the batch already open """
+    if _delete_batch.get() is not None:
+        yield
+        return
+    batch = DeleteBatch()
+    token = _delete_batch.set(batch)
+    try:
+        with transaction.atomic(using=using):
+            yield
+            batch.flush()
+    finally:
+        _delete_batch.reset(token)
+
+
+class BatchedDeleteQuerySet(models.QuerySet):
+    def delete(self):
+        with delete_batch(self.db):
+            return super().delete()
+
+
+class BatchedDeleteMixin:
+    def delete(self, using=None, keep_parents=False):
+        with delete_batch(using or self._state.db):
+            return super().delete(using=using, keep_parents=keep_parents)
+
+
+class JiraUser(BatchedDeleteMixin, TrackChangesMixin, models.Model):
+    UNIQUE_FIELD_ERRORS = {
+        "user_name": "A user with this username already exists.",
+        "email": "A user with this email already exists.",
+        "mobile_number": "A user with this mobile number already exists."
+    }
+
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
     role = models.CharField(max_length=20, choices=UserRoleTypes.choices(), default=UserRoleTypes.USER.value)
@@ -15,15 +131,27 @@ class JiraUser(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BatchedDeleteQuerySet.as_manager()
+
     class Meta:
         db_table = 'jira_users'
         managed = True
         constraints = [
             models.UniqueConstraint(fields=["user_name", "email"], name="unique_user_name_email")
         ]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="jira_users_created_id_idx"),
+            models.Index(fields=["role", "created_at", "id"], name="jira_users_role_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="jira_users_updated_id_idx")
+        ]
 
     def clean(self):
         """Custom validation before saving"""
+        self.validate_values()
+        self.validate_unique_fields()
+
+    def validate_values(self):
+        """ The checks of clean that need no query; bulk imports check uniqueness per batch instead """
         if not self.first_name or not self.last_name:
             raise ValidationError("First name and last name cannot be empty.")
 
@@ -31,69 +159,185 @@ class JiraUser(models.Model):
         if self.role not in valid_roles:
             raise ValidationError(f"Invalid role: {self.role}. Choose from {valid_roles}.")
 
-        if JiraUser.objects.exclude(pk=self.pk).filter(user_name=self.user_name).exists():
-            raise ValidationError("A user with this username already exists.")
-
         if not email_validator(self.email):
             raise ValidationError(f"{self.email} is not a valid email address")
 
-        if JiraUser.objects.exclude(pk=self.pk).filter(email=self.email).exists():
-            raise ValidationError("A user with this email already exists.")
-
         if len(self.mobile_number) < 10:
             raise ValidationError("Mobile number must be at least 10 digits long.")
 
-        if JiraUser.objects.exclude(pk=self.pk).filter(mobile_number=self.mobile_number).exists():
-            raise ValidationError("A user with this mobile number already exists.")
+    def validate_unique_fields(self):
+        """ Checks every changed unique field in one query instead of one query per field """
+        changed = [field for field in self.UNIQUE_FIELD_ERRORS if self.has_changed(field)]
+        if not changed:
+            return
+
+        lookup = models.Q()
+        for field in changed:
+            lookup |= models.Q(**{field: getattr(self, field)})
+
+        clashes = list(JiraUser.objects.exclude(pk=self.pk).filter(lookup).values(*changed)[:len(changed)])
+        for field in changed:
+            if any(row[field] == getattr(self, field) for row in clashes):
+                raise ValidationError(self.UNIQUE_FIELD_ERRORS[field])
 
     def save(self, *args, **kwargs):
         """ Calls clean before saving """
         self.clean()
         super().save(*args, **kwargs)
+        self.remember_values()
 
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name} - {self.role}"
 
 
-class Epic(models.Model):
+class Epic(BatchedDeleteMixin, TrackChangesMixin, models.Model):
     name = models.CharField(max_length=100, unique=True)
-    user = models.ForeignKey(JiraUser, on_delete=models.CASCADE, related_name="epics")
+    # epics_user_created_idx leads with user_id, a separate FK index would only slow writes down
+    user = models.ForeignKey(JiraUser, on_delete=models.CASCADE, related_name="epics", db_index=False)
     is_completed = models.BooleanField(default=False)
+    task_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_task_count = models.PositiveIntegerField(default=0, editable=False)
+    open_task_count = models.PositiveIntegerField(default=0, editable=False)
+    subtask_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    COUNTER_FIELDS = ("task_count", "completed_task_count", "open_task_count", "subtask_count")
+
+    objects = BatchedDeleteQuerySet.as_manager()
+
     class Meta:
         db_table = 'epics'
         managed = True
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="epics_created_id_idx"),
+            models.Index(fields=["user", "created_at", "id"], name="epics_user_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="epics_updated_id_idx")
+        ]
 
     def clean(self):
         """Custom validation before saving"""
         if not self.name:
             raise ValidationError("Epic name cannot be empty.")
 
-        if not self.user:
+        if self.user_id is None:
             raise ValidationError("User must be specified.")
 
     def save(self, *args, **kwargs):
         """ Calls clean before saving """
         self.clean()
+        if not self._state.adding and "update_fields" not in kwargs:
+            # counters are owned by the task write paths; never overwrite them with stale values
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
+        self.remember_values()
+
+    @staticmethod
+    def counter_deltas(is_completed, parent_task_id, sign=1):
+        return {
+            "task_count": sign,
+            "completed_task_count": sign if is_completed else 0,
+            "open_task_count": 0 if is_completed else sign,
+            "subtask_count": sign if parent_task_id is not None else 0
+        }
+
+    @classmethod
+    def adjust_counters(cls, epic_id, deltas):
+        changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if epic_id is not None and changes:
+            cls.objects.filter(pk=epic_id).update(**changes, updated_at=timezone.now())
+
+    @classmethod
+    def reload_counters(cls, epics):
+        """ Copies the counters the database holds now onto in-memory epics, in one query """
+        epics = {epic.pk: epic for epic in epics if epic is not None}
+        if not epics:
+            return
+        for values in cls.objects.filter(pk__in=list(epics)).values("pk", "updated_at", *cls.COUNTER_FIELDS):
+            epic = epics[values.pop("pk")]
+            for field, value in values.items():
+                setattr(epic, field, value)
+
+    @classmethod
+    def refresh_counters(cls, epic_ids=None):
+        """ Recomputes counters from the tasks table in one UPDATE (all epics when epic_ids is None) """
+        def tally(**filters):
+            tasks = Task.objects.filter(epic=OuterRef("pk"), **filters).order_by().values("epic")
+            return Coalesce(Subquery(tasks.annotate(total=Count("id")).values("total")), Value(0))
+
+        epics = cls.objects.all() if epic_ids is None else cls.objects.filter(pk__in=list(epic_ids))
+        return epics.update(
+            task_count=tally(),
+            completed_task_count=tally(is_completed=True),
+            open_task_count=tally(is_completed=False),
+            subtask_count=tally(parent_task__isnull=False),
+            updated_at=timezone.now()
+        )
 
     def __str__(self):
         return f"{self.user.name}"
 
 
-class Task(models.Model):
+class TaskManager(models.Manager.from_queryset(BatchedDeleteQuerySet)):
+    """ Adds recursive hierarchy lookups; each returns rows annotated with depth, in one query """
+
+    def columns(self, alias):
+        # explicit columns: the table also carries the search_vector maintained outside the ORM
+        return ", ".join(
+            f"{alias}.{connection.ops.quote_name(field.column)}" for field in self.model._meta.concrete_fields
+        )
+
+    def subtree(self, root_id, max_depth=constant.TASK_TREE_MAX_DEPTH):
+        """ The root task (depth 0) and its descendants down to max_depth, ordered by depth """
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        return self.raw(
+            f"""
+            WITH RECURSIVE tree AS (
+                SELECT {self.columns("root")}, 0 AS depth FROM {table} root WHERE root.id = %s
+                UNION ALL
+                SELECT {self.columns("child")}, tree.depth + 1 FROM {table} child
+                JOIN tree ON child.parent_task_id = tree.id
+                WHERE tree.depth < %s
+            )
+            SELECT * FROM tree ORDER BY depth, id
+            """,
+            [root_id, max_depth]
+        )
+
+    def ancestors(self, task_id, max_depth=constant.TASK_TREE_MAX_DEPTH):
+        """ The parent chain of a task, nearest parent first (depth 1), excluding the task itself """
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        return self.raw(
+            f"""
+            WITH RECURSIVE chain AS (
+                SELECT {self.columns("task")}, 0 AS depth FROM {table} task WHERE task.id = %s
+                UNION ALL
+                SELECT {self.columns("parent")}, chain.depth + 1 FROM {table} parent
+                JOIN chain ON parent.id = chain.parent_task_id
+                WHERE chain.depth < %s
+            )
+            SELECT * FROM chain WHERE depth > 0 ORDER BY depth
+            """,
+            [task_id, max_depth]
+        )
+
+
+class Task(BatchedDeleteMixin, TrackChangesMixin, models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
-    epic = models.ForeignKey(Epic, on_delete=models.CASCADE, related_name="tasks")
+    # the composite indexes below lead with epic_id and assignee_id, so the FK indexes would be redundant
+    epic = models.ForeignKey(Epic, on_delete=models.CASCADE, related_name="tasks", db_index=False)
     owner = models.ForeignKey(JiraUser, on_delete=models.CASCADE, related_name="tasks")
     assignee = models.ForeignKey(
         JiraUser,
         on_delete=models.CASCADE,
         related_name="assigned_tasks",
         null=True,
-        blank=True
+        blank=True,
+        db_index=False
     )
     task_type = models.CharField(max_length=20, choices=TaskTypeEnum.choices(), default=TaskTypeEnum.MAIN_TASK.value)
     parent_task = models.ForeignKey("self", on_delete=models.CASCADE, null=True, blank=True, related_name="subtasks")
@@ -101,25 +345,34 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskManager()
+
     class Meta:
         db_table = 'tasks'
         managed = True
         constraints = [
             models.UniqueConstraint(fields=["name", "epic"], name="unique_task_name_epic")
         ]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="tasks_created_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="tasks_updated_id_idx"),
+            models.Index(fields=["epic", "created_at", "id"], name="tasks_epic_created_idx"),
+            models.Index(fields=["epic", "is_completed", "created_at", "id"], name="tasks_epic_done_idx"),
+            models.Index(fields=["assignee", "is_completed", "created_at", "id"], name="tasks_assignee_done_idx")
+        ]
 
     def clean(self):
         """Custom validation before saving"""
         if not self.name:
             raise ValidationError("Task name cannot be empty.")
 
-        if not self.epic:
+        if self.epic_id is None:
             raise ValidationError("Epic must be specified.")
 
-        if not self.owner:
+        if self.owner_id is None:
             raise ValidationError("Owner must be specified.")
 
-        if not self.assignee:
+        if self.assignee_id is None:
             raise ValidationError("Assignee must be specified.")
 
         valid_task_type = [choice[0] for choice in TaskTypeEnum.choices()]
@@ -127,15 +380,50 @@ class Task(models.Model):
             raise ValidationError(f"Invalid task type: {self.task_type}. Choose from {valid_task_type}.")
 
     def save(self, *args, **kwargs):
-        """ Calls clean before saving """
+        """ Calls clean before saving, keeping the epic counters in the same transaction """
         self.clean()
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        loaded = getattr(self, "_loaded_values", None)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Epic.adjust_counters(self.epic_id, Epic.counter_deltas(self.is_completed, self.parent_task_id))
+            elif loaded is None:
+                Epic.refresh_counters([self.epic_id])
+            elif any(self.has_changed(field) for field in ("epic_id", "is_completed", "parent_task_id")):
+                Epic.adjust_counters(
+                    loaded.get("epic_id", self.epic_id),
+                    Epic.counter_deltas(
+                        loaded.get("is_completed", self.is_completed),
+                        loaded.get("parent_task_id", self.parent_task_id),
+                        sign=-1
+                    )
+                )
+                Epic.adjust_counters(self.epic_id, Epic.counter_deltas(self.is_completed, self.parent_task_id))
+
+        if Task.epic.is_cached(self):
+            # the counters were changed with an UPDATE; the epic this task holds would show the old values
+            Epic.reload_counters([self.epic])
+        self.remember_values()
 
     def __str__(self):
-        return f"Task: {self.name} (Parent: {self.parent_task.name if self.parent_task else 'None'})"
+        # never lazily load the parent just to print it
+        if Task.parent_task.is_cached(self):
+            parent = self.parent_task.name if self.parent_task else "None"
+        else:
+            parent = self.parent_task_id or "None"
+        return f"Task: {self.name} (Parent: {parent})"
+
+
+class CommentManager(models.Manager.from_queryset(BatchedDeleteQuerySet)):
+    """ Comments that are not soft-deleted; Comment.all_objects sees every row """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
 
 
-class Comment(models.Model):
+class Comment(BatchedDeleteMixin, TrackChangesMixin, models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comments")
     comment = models.TextField()
     user = models.ForeignKey(JiraUser, on_delete=models.CASCADE, related_name="user_comment")
@@ -143,22 +431,53 @@ class Comment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
 
+    # the first manager is the default one, which task.comments and prefetches use as well
+    objects = CommentManager()
+    all_objects = BatchedDeleteQuerySet.as_manager()
+
     class Meta:
         db_table = 'comments'
         managed = True
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="comments_created_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="comments_updated_id_idx"),
+            models.Index(
+                fields=["task", "created_at", "id"],
+                name="comments_live_task_idx",
+                condition=models.Q(is_deleted=False)
+            )
+        ]
 
     def clean(self):
         """Custom validation before saving"""
-        if not self.task:
+        if self.task_id is None:
             raise ValidationError("Task must be specified.")
 
-        if not self.user:
+        if self.user_id is None:
             raise ValidationError("User must be specified.")
 
     def save(self, *args, **kwargs):
         """ Calls clean before saving """
         self.clean()
         super().save(*args, **kwargs)
+        self.remember_values()
 
     def __str__(self):
         return self.comment
+
+
+class Tombstone(models.Model):
+    """ Records a deleted row so incremental sync can tell clients to drop it """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'tombstones'
+        managed = True
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="tombstones_deleted_id_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.model}:{self.object_id}"
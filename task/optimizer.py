@@ -0,0 +1,93 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+from resources.all_purpose import constant
+
+
+def selected_fields(field_nodes, fragments):
+    """ Maps each field selected under the given nodes to its (merged) field nodes, expanding fragments """
+    fields = {}
+
+    def collect(selection_set):
+        if selection_set is None:
+            return
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                fields.setdefault(selection.name.value, []).append(selection)
+            elif isinstance(selection, InlineFragmentNode):
+                collect(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = fragments.get(selection.name.value)
+                if fragment is not None:
+                    collect(fragment.selection_set)
+
+    for node in field_nodes:
+        collect(node.selection_set)
+    return fields
+
+
+def first_per_parent(queryset, attname, size=constant.MAX_PAGE_SIZE):
+    """ The first `size` rows by id of every parent, read in one query; nested lists never return more """
+    # a window filter instead of a slice, so the related managers can still filter the prefetched queryset
+    return (
+        queryset.annotate(position=Window(RowNumber(), partition_by=F(attname), order_by="id"))
+        .filter(position__lte=size)
+        .order_by("id")
+    )
+
+
+def plan(model, field_nodes, fragments):
+    """ Returns the only()/select_related()/prefetch_related() arguments needed by a selection """
+    only = {model._meta.pk.name}
+    select = []
+    prefetch = []
+
+    # FK columns are always read: the loaders key on them and deferring them costs a query per row
+    for field in model._meta.concrete_fields:
+        if field.is_relation:
+            only.add(field.name)
+
+    for name, nodes in selected_fields(field_nodes, fragments).items():
+        try:
+            field = model._meta.get_field(to_snake_case(name))
+        except FieldDoesNotExist:
+            continue
+
+        if field.is_relation and field.concrete:
+            sub_only, sub_select, sub_prefetch = plan(field.related_model, nodes, fragments)
+            only.update(f"{field.name}__{column}" for column in sub_only)
+            select.append(field.name)
+            select.extend(f"{field.name}__{path}" for path in sub_select)
+            prefetch.extend(
+                Prefetch(f"{field.name}__{item.prefetch_through}", queryset=item.queryset)
+                for item in sub_prefetch
+            )
+        elif field.one_to_many:
+            # same order and per-parent bound as the loaders, so both paths return the same rows
+            queryset = apply(field.related_model._default_manager.all(), nodes, fragments)
+            queryset = first_per_parent(queryset, field.field.attname)
+            prefetch.append(Prefetch(field.get_accessor_name(), queryset=queryset))
+        elif field.concrete:
+            only.add(field.name)
+
+    return only, select, prefetch
+
+
+def apply(queryset, field_nodes, fragments, columns=()):
+    only, select, prefetch = plan(queryset.model, field_nodes, fragments)
+    queryset = queryset.only(*only, *columns)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def optimize(queryset, info, path=(), columns=()):
+    """ Narrows a root queryset to the columns and relations the client actually selected """
+    field_nodes = info.field_nodes
+    for name in path:
+        field_nodes = selected_fields(field_nodes, info.fragments).get(name, [])
+    return apply(queryset, field_nodes, info.fragments, columns)
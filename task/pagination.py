@@ -0,0 +1,83 @@
+import base64
+import binascii
+from datetime import datetime
+import graphene
+from django.db.models import Q
+from graphql import GraphQLError
+from resources.all_purpose import constant
+from task.loaders import get_loaders
+from task.optimizer import optimize
+
+
+def encode_cursor(instance):
+    raw = f"{instance.created_at.isoformat()}|{instance.pk}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise GraphQLError("Invalid cursor.")
+
+
+def encode_offset_cursor(offset):
+    """ Cursor for results ordered by a computed score, where there is no stable column to key on """
+    return base64.urlsafe_b64encode(f"offset|{offset}".encode("utf-8")).decode("ascii")
+
+
+def decode_offset_cursor(cursor):
+    try:
+        prefix, offset = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        if prefix != "offset" or int(offset) < 0:
+            raise ValueError(cursor)
+        return int(offset)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise GraphQLError("Invalid cursor.")
+
+
+def page_size(first):
+    if first is None:
+        return constant.DEFAULT_PAGE_SIZE
+    if first < 1:
+        raise GraphQLError("first must be a positive integer.")
+    return min(first, constant.MAX_PAGE_SIZE)
+
+
+def paginate(queryset, info, connection_type, first=None, after=None):
+    """ Returns one keyset page ordered by (created_at, id); only the page plus one probe row is read """
+    size = page_size(first)
+    queryset = optimize(queryset, info, path=("edges", "node"), columns=("created_at",))
+    queryset = queryset.order_by("created_at", "id")
+
+    if after:
+        created_at, pk = decode_cursor(after)
+        queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    loaders = get_loaders(info)
+    if loaders.is_async:
+        return _apaginate(queryset[:size + 1], loaders, connection_type, size, after)
+
+    return build_connection(list(queryset[:size + 1]), loaders, connection_type, size, after)
+
+
+async def _apaginate(queryset, loaders, connection_type, size, after):
+    rows = [row async for row in queryset]
+    return build_connection(rows, loaders, connection_type, size, after)
+
+
+def build_connection(rows, loaders, connection_type, size, after):
+    has_next_page = len(rows) > size
+    rows = loaders.prime(rows[:size])
+
+    edges = [connection_type.Edge(node=row, cursor=encode_cursor(row)) for row in rows]
+    return connection_type(
+        edges=edges,
+        page_info=graphene.relay.PageInfo(
+            has_next_page=has_next_page,
+            has_previous_page=after is not None,
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None
+        )
+    )
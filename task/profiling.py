@@ -0,0 +1,257 @@
+import contextvars
+import inspect
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import connections
+from resources.all_purpose import constant
+
+logger = logging.getLogger(__name__)
+
+_profile = contextvars.ContextVar("graphql_profile", default=None)
+_field = contextvars.ContextVar("graphql_profile_field", default=None)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r"\bIN \((?:[^()]*)\)", re.IGNORECASE)
+
+
+def fingerprint(sql):
+    """ The statement with literals and IN lists collapsed, so repeats with other ids compare equal """
+    return IN_LISTS.sub("IN (...)", LITERALS.sub("?", sql))
+
+
+class LatencyHistogram:
+    """ Cumulative request latency buckets in milliseconds, in the Prometheus layout """
+
+    def __init__(self, buckets=constant.PROFILING_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.total += 1
+            self.sum += value
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+
+    def render(self, name, labels):
+        with self._lock:
+            lines = [
+                f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+                for bound, count in zip(self.buckets, self.counts)
+            ]
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.total}')
+            lines.append(f"{name}_sum{{{labels}}} {self.sum:.3f}")
+            lines.append(f"{name}_count{{{labels}}} {self.total}")
+        return lines
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def observe(operation, duration_ms, db_ms):
+    key = operation or "anonymous"
+    with _histograms_lock:
+        if key not in _histograms and len(_histograms) >= constant.PROFILING_MAX_OPERATIONS:
+            # client-chosen operation names must not grow the registry without bound
+            key = "other"
+        if key not in _histograms:
+            _histograms[key] = (LatencyHistogram(), LatencyHistogram())
+        request_histogram, db_histogram = _histograms[key]
+    request_histogram.observe(duration_ms)
+    db_histogram.observe(db_ms)
+
+
+_connections_opened = Counter()
+
+
+def count_connection(alias):
+    with _histograms_lock:
+        _connections_opened[alias] += 1
+
+
+def connections_opened(alias):
+    with _histograms_lock:
+        return _connections_opened[alias]
+
+
+def pool_stats():
+    """ psycopg pool statistics of every alias configured with OPTIONS["pool"] """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
+
+
+def render_metrics():
+    with _histograms_lock:
+        histograms = sorted(_histograms.items())
+        opened = sorted(_connections_opened.items())
+    lines = []
+    for operation, (request_histogram, db_histogram) in histograms:
+        labels = 'operation="{}"'.format(operation.replace("\\", "\\\\").replace('"', '\\"'))
+        lines += request_histogram.render("graphql_request_duration_ms", labels)
+        lines += db_histogram.render("graphql_request_db_duration_ms", labels)
+
+    # with persistent connections or a pool this grows with the worker count, not the request count
+    for alias, count in opened:
+        lines.append(f'db_connections_opened_total{{alias="{alias}"}} {count}')
+
+    for alias, stats in pool_stats().items():
+        # psycopg omits counters that are still zero
+        size = stats.get("pool_size", 0)
+        available = stats.get("pool_available", 0)
+        maximum = stats.get("pool_max", 0)
+        lines += [
+            f'db_pool_size{{alias="{alias}"}} {size}',
+            f'db_pool_available{{alias="{alias}"}} {available}',
+            f'db_pool_max_size{{alias="{alias}"}} {maximum}',
+            f'db_pool_saturation{{alias="{alias}"}} {(size - available) / maximum if maximum else 0:.3f}',
+            f'db_pool_requests_waiting{{alias="{alias}"}} {stats.get("requests_waiting", 0)}',
+            f'db_pool_requests_total{{alias="{alias}"}} {stats.get("requests_num", 0)}',
+            f'db_pool_requests_queued_total{{alias="{alias}"}} {stats.get("requests_queued", 0)}',
+            f'db_pool_requests_wait_ms_total{{alias="{alias}"}} {stats.get("requests_wait_ms", 0)}',
+            f'db_pool_requests_errors_total{{alias="{alias}"}} {stats.get("requests_errors", 0)}',
+            f'db_pool_connections_total{{alias="{alias}"}} {stats.get("connections_num", 0)}'
+        ]
+    return "\n".join(lines) + "\n"
+
+
+class QueryProfile:
+    """ Resolver timings and SQL statements of one GraphQL operation """
+
+    def __init__(self, operation_name=None, query=None, expose=False):
+        self.operation_name = operation_name
+        self.query = query
+        self.expose = expose
+        self.started = time.perf_counter()
+        self.fields = {}
+        self.statements = []
+
+    def field_stats(self, key):
+        return self.fields.setdefault(key, {"field": key, "calls": 0, "ms": 0.0, "maxMs": 0.0, "sql": 0})
+
+    def record_field(self, key, elapsed_ms):
+        stats = self.field_stats(key)
+        stats["calls"] += 1
+        stats["ms"] += elapsed_ms
+        stats["maxMs"] = max(stats["maxMs"], elapsed_ms)
+
+    def record_sql(self, sql, elapsed_ms, field):
+        self.statements.append((fingerprint(sql), elapsed_ms, field))
+        if field is not None:
+            self.field_stats(field)["sql"] += 1
+
+    def summary(self):
+        counts = Counter(statement[0] for statement in self.statements)
+        duplicates = [
+            {
+                "sql": sql,
+                "count": count,
+                "fields": sorted({field for statement, _, field in self.statements if statement == sql and field})
+            }
+            for sql, count in counts.most_common() if count > 1
+        ]
+        fields = sorted(self.fields.values(), key=lambda stats: stats["ms"], reverse=True)
+        return {
+            "operation": self.operation_name,
+            "durationMs": round((time.perf_counter() - self.started) * 1000, 3),
+            "sqlCount": len(self.statements),
+            "dbMs": round(sum(statement[1] for statement in self.statements), 3),
+            "duplicates": duplicates,
+            "fields": [
+                dict(stats, ms=round(stats["ms"], 3), maxMs=round(stats["maxMs"], 3))
+                for stats in fields[:constant.PROFILING_MAX_FIELDS]
+            ]
+        }
+
+    def finish(self):
+        summary = self.summary()
+        observe(self.operation_name, summary["durationMs"], summary["dbMs"])
+        logger.info(json.dumps({
+            "event": "graphql.request",
+            "operation": self.operation_name,
+            "durationMs": summary["durationMs"],
+            "sqlCount": summary["sqlCount"],
+            "dbMs": summary["dbMs"],
+            "duplicateStatements": len(summary["duplicates"])
+        }))
+        if summary["durationMs"] >= settings.GRAPHQL_SLOW_QUERY_MS:
+            logger.warning(json.dumps({"event": "graphql.slow_request", **summary, "query": self.query}))
+        return summary
+
+
+def start_profile(request, operation_name, query):
+    """ Returns a QueryProfile when GRAPHQL_PROFILING selects this request, else None """
+    requested = request.headers.get("X-GraphQL-Profile") == "1"
+    mode = settings.GRAPHQL_PROFILING
+    if mode != "all" and not (mode == "header" and requested):
+        return None
+    return QueryProfile(operation_name, query, expose=requested and settings.GRAPHQL_PROFILING_EXTENSIONS)
+
+
+def activate(profile):
+    return _profile.set(profile)
+
+
+def deactivate(token):
+    _profile.reset(token)
+
+
+def record_sql(execute, sql, params, many, context):
+    """ Connection execute wrapper; a no-op unless the current request is being profiled """
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_sql(sql, (time.perf_counter() - started) * 1000, _field.get())
+
+
+def install_sql_recorder(connection):
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+class ProfilingMiddleware:
+    """ Times every resolver and attributes the SQL it runs to its Type.field key """
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def resolve(self, next, root, info, **args):
+        key = f"{info.parent_type.name}.{info.field_name}"
+        started = time.perf_counter()
+        token = _field.set(key)
+        try:
+            result = next(root, info, **args)
+        finally:
+            _field.reset(token)
+
+        if inspect.isawaitable(result):
+            return self.resolve_async(result, key, started)
+        self.profile.record_field(key, (time.perf_counter() - started) * 1000)
+        return result
+
+    async def resolve_async(self, result, key, started):
+        # under the async executor siblings interleave, so SQL attribution is best effort
+        token = _field.set(key)
+        try:
+            return await result
+        finally:
+            _field.reset(token)
+            self.profile.record_field(key, (time.perf_counter() - started) * 1000)
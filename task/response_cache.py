@@ -0,0 +1,187 @@
+import hashlib
+import inspect
+import json
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models, transaction
+from graphene.relay import Connection
+from graphql import GraphQLList, get_named_type, get_nullable_type
+from resources.all_purpose import constant
+from task.documents import LRUCache
+
+
+class LocalBackend:
+    """ In-process LRU; invalidations only reach the worker that performed the write """
+
+    def __init__(self, max_entries):
+        self._entries = LRUCache(max_entries)
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                found[key] = entry[0]
+        return found
+
+    def set_many(self, values, timeout):
+        expires_at = time.monotonic() + timeout if timeout else None
+        for key, value in values.items():
+            self._entries.set(key, (value, expires_at))
+
+
+class DjangoCacheBackend:
+    """ Any configured Django cache (memcached, Redis), shared by every worker """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def set_many(self, values, timeout):
+        self.cache.set_many(values, timeout or None)
+
+
+def instance_tag(model, pk):
+    return f"{model._meta.label_lower}:{pk}"
+
+
+def list_tag(model):
+    return f"{model._meta.label_lower}:list"
+
+
+def new_version(stamp=None):
+    """ A tag version: when the tag was last invalidated, and a token no earlier version can equal """
+    return time.time() if stamp is None else stamp, uuid.uuid4().hex
+
+
+class ResponseCache:
+    """ Query results keyed on document and variables, invalidated through per-row and per-table tag versions """
+
+    def __init__(self, entries, tags, timeout):
+        self.entries = entries
+        # a separate store, so responses never evict the tag versions they depend on
+        self.tags = tags
+        self.timeout = timeout
+
+    def make_key(self, document_hash, operation_name, variables):
+        raw = json.dumps([document_hash, operation_name, variables], sort_keys=True, default=str)
+        return "gql:result:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        entry = self.entries.get_many([key]).get(key)
+        if entry is None:
+            return None
+
+        tags = entry["tags"]
+        versions = self.tags.get_many([f"gql:tag:{tag}" for tag in tags])
+        for tag, version in tags.items():
+            if versions.get(f"gql:tag:{tag}") != version:
+                return None
+        return entry["data"]
+
+    def set(self, key, data, tags, started, timeout=None):
+        """ Stores a result read by a request that started at `started`, unless one of its tags moved since """
+        tag_keys = [f"gql:tag:{tag}" for tag in tags]
+        versions = self.tags.get_many(tag_keys)
+        # a tag never invalidated (or evicted) gets a version older than any request
+        missing = {tag_key: new_version(0.0) for tag_key in tag_keys if tag_key not in versions}
+        if missing:
+            self.tags.set_many(missing, None)
+            versions.update(missing)
+
+        # the rows may have been read before an invalidation that happened during the request; storing them
+        # under the newer version would serve them as fresh, so skip the store instead
+        if any(versions[tag_key][0] >= started - constant.RESPONSE_CACHE_CLOCK_SKEW for tag_key in tag_keys):
+            return False
+
+        entry = {"data": data, "tags": {tag: versions[f"gql:tag:{tag}"] for tag in tags}}
+        self.entries.set_many({key: entry}, self.timeout if timeout is None else timeout)
+        return True
+
+    def invalidate(self, tags):
+        self.tags.set_many({f"gql:tag:{tag}": new_version() for tag in tags}, None)
+
+    def invalidate_instances(self, instances):
+        """ Bumps the tags of the rows, their tables' root lists and every row they reference (old and new) """
+        tags = set()
+        for instance in instances:
+            model = type(instance)
+            tags.add(instance_tag(model, instance.pk))
+            tags.add(list_tag(model))
+            loaded = getattr(instance, "_loaded_values", {})
+            for field in model._meta.concrete_fields:
+                if not field.is_relation:
+                    continue
+                for value in (getattr(instance, field.attname), loaded.get(field.attname)):
+                    if value is not None and value is not models.DEFERRED:
+                        tags.add(instance_tag(field.related_model, value))
+        if tags:
+            # after commit, so a reader cannot re-cache rows from before the write
+            transaction.on_commit(lambda: self.invalidate(tags))
+
+
+class CacheTagMiddleware:
+    """ Records which rows and root lists a query read, into info.context.cache_tags """
+
+    def resolve(self, next, root, info, **args):
+        result = next(root, info, **args)
+        tags = getattr(info.context, "cache_tags", None)
+        if tags is None:
+            return result
+        if inspect.isawaitable(result):
+            return self.tag_async(result, info, tags)
+        self.tag(result, info, tags)
+        return result
+
+    async def tag_async(self, result, info, tags):
+        result = await result
+        self.tag(result, info, tags)
+        return result
+
+    def tag(self, result, info, tags):
+        return_type = get_nullable_type(info.return_type)
+        graphene_type = getattr(get_named_type(return_type), "graphene_type", None)
+        if graphene_type is None:
+            return
+
+        if isinstance(graphene_type, type) and issubclass(graphene_type, Connection):
+            graphene_type = graphene_type._meta.node
+        model = getattr(getattr(graphene_type, "_meta", None), "model", None)
+        if model is None:
+            return
+
+        is_list = isinstance(return_type, GraphQLList) or isinstance(result, Connection)
+        if is_list and info.parent_type is info.schema.query_type:
+            tags.add(list_tag(model))
+
+        for instance in (result if isinstance(result, (list, tuple)) else [result]):
+            if isinstance(instance, models.Model):
+                tags.add(instance_tag(type(instance), instance.pk))
+
+
+def invalidate_instances(instances):
+    """ Entry point for write paths that bypass model signals (bulk_create, bulk_update, update) """
+    cache = get_response_cache()
+    if cache is not None:
+        cache.invalidate_instances(instances)
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """ Returns the configured response cache, or None when GRAPHQL_RESPONSE_CACHE_BACKEND is empty """
+    global _response_cache
+    if _response_cache is None and settings.GRAPHQL_RESPONSE_CACHE_BACKEND:
+        if settings.GRAPHQL_RESPONSE_CACHE_BACKEND == "django":
+            entries = tags = DjangoCacheBackend(settings.GRAPHQL_RESPONSE_CACHE_ALIAS)
+        else:
+            entries = LocalBackend(constant.RESPONSE_CACHE_SIZE)
+            tags = LocalBackend(constant.RESPONSE_CACHE_TAG_SIZE)
+        _response_cache = ResponseCache(entries, tags, settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT)
+    return _response_cache
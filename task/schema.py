@@ -3,6 +3,9 @@ import task.schemas.user as user
 import task.schemas.epic as epic
 import task.schemas.task as task
 import task.schemas.comment as comment
+import task.schemas.search as search
+import task.schemas.board as board
+import task.schemas.sync as sync
 
 
 class Query(
@@ -10,6 +13,9 @@ class Query(
     epic.Query,
     task.Query,
     comment.Query,
+    search.Query,
+    board.Query,
+    sync.Query,
     graphene.ObjectType
 ):
     pass
@@ -25,4 +31,10 @@ class Mutation(
     pass
 
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+class Subscription(
+    task.Subscription,
+    epic.Subscription,
+    comment.Subscription,
+    graphene.ObjectType
+):
+    pass
@@ -0,0 +1,44 @@
+import graphene
+from task.board import load_board
+from task.schemas.epic import EpicType
+from task.schemas.task import TaskType
+from task.schemas.user import JiraUserType
+
+
+class BoardEpicType(graphene.ObjectType):
+    epic = graphene.Field(EpicType)
+    assigned_open_count = graphene.Int()
+    assigned_completed_count = graphene.Int()
+    owned_open_count = graphene.Int()
+    owned_completed_count = graphene.Int()
+    open_count = graphene.Int()
+    completed_count = graphene.Int()
+    open_tasks = graphene.List(TaskType)
+    completed_tasks = graphene.List(TaskType)
+
+    def resolve_epic(self, info):
+        return self.board.loaders.epics.load(self.epic_id)
+
+    def resolve_open_tasks(self, info):
+        return self.tasks(False)
+
+    def resolve_completed_tasks(self, info):
+        return self.tasks(True)
+
+
+class BoardType(graphene.ObjectType):
+    user = graphene.Field(JiraUserType)
+    assigned_open_count = graphene.Int()
+    assigned_completed_count = graphene.Int()
+    owned_open_count = graphene.Int()
+    owned_completed_count = graphene.Int()
+    open_count = graphene.Int()
+    completed_count = graphene.Int()
+    epics = graphene.List(BoardEpicType)
+
+
+class Query(graphene.ObjectType):
+    my_board = graphene.Field(BoardType, user_id=graphene.ID(required=True), tasks_per_group=graphene.Int())
+
+    def resolve_my_board(self, info, user_id, tasks_per_group=None):
+        return load_board(info, user_id, tasks_per_group)
@@ -1,11 +1,21 @@
 import graphene
+from django.db import IntegrityError, transaction
 from graphql import GraphQLError
-from task import models
+from task import bulk, models
+from task.loaders import get_one, load_relation, reset_loaders
+from task.pagination import paginate
+from task.response_cache import invalidate_instances
+from task.subscriptions import CREATED, listen, publish_changes
 from graphene_django import DjangoObjectType
 from task.schemas.task import TaskType
 
 
 class CommentType(DjangoObjectType):
+    field_costs = {
+        "task": 1,
+        "user": 1
+    }
+
     class Meta:
         model = models.Comment
         fields = (
@@ -18,6 +28,17 @@ class CommentType(DjangoObjectType):
             "is_deleted"
         )
 
+    def resolve_task(self, info):
+        return load_relation(info, self, "task", "tasks", self.task_id)
+
+    def resolve_user(self, info):
+        return load_relation(info, self, "user", "users", self.user_id)
+
+
+class CommentConnection(graphene.relay.Connection):
+    class Meta:
+        node = CommentType
+
 
 class CreateComment(graphene.Mutation):
     class Arguments:
@@ -80,14 +101,15 @@ class UpdateComment(graphene.Mutation):
 
     def mutate(self, info, id, msg=None, is_deleted=None):
         try:
-            comment_instance = models.Comment.objects.get(id=id)
+            # deleted comments can still be edited and restored
+            comment_instance = models.Comment.all_objects.get(id=id)
 
             if comment_instance:
 
                 if msg:
                     comment_instance.comment = msg
-                if is_deleted:
-                    comment_instance.is_deleted = is_deleted == True
+                if is_deleted is not None:
+                    comment_instance.is_deleted = is_deleted
 
                 comment_instance.save()
 
@@ -114,22 +136,110 @@ class UpdateComment(graphene.Mutation):
                 success=False,
                 message="Comment not found."
             )
+
+
+class CommentInput(graphene.InputObjectType):
+    task = graphene.ID(required=True)
+    msg = graphene.String(required=True)
+    user = graphene.ID(required=True)
+
+
+class CommentResult(graphene.ObjectType):
+    index = graphene.Int()
+    comment = graphene.Field(CommentType)
+    success = graphene.Boolean(default_value=False)
+    message = graphene.String(default_value="")
+
+
+class CreateComments(graphene.Mutation):
+    class Arguments:
+        comments = graphene.List(graphene.NonNull(CommentInput), required=True)
+
+    results = graphene.List(CommentResult)
+    success = graphene.Boolean(default_value=False)
+    message = graphene.String(default_value="")
+
+    def mutate(self, info, comments):
+        tasks = bulk.fetch_by_ids(models.Task, [item.task for item in comments])
+        users = bulk.fetch_by_ids(models.JiraUser, [item.user for item in comments])
+
+        results = []
+        pending = []
+        for index, item in enumerate(comments):
+            task_instance = bulk.lookup(tasks, item.task)
+            user_instance = bulk.lookup(users, item.user)
+            if task_instance is None:
+                results.append(CommentResult(index=index, message="Task not found."))
+                continue
+            if user_instance is None:
+                results.append(CommentResult(index=index, message="User not found."))
+                continue
+
+            comment = models.Comment(task=task_instance, comment=item.msg, user=user_instance)
+            results.append(
+                CommentResult(index=index, comment=comment, success=True, message="Comment created successfully.")
+            )
+            pending.append(comment)
+
+        try:
+            with transaction.atomic():
+                models.Comment.objects.bulk_create(pending)
+                invalidate_instances(pending)
+                publish_changes(pending, CREATED)
+        except IntegrityError as e:
+            for result in results:
+                if result.success:
+                    result.comment, result.success, result.message = None, False, str(e)
+
+        created = sum(1 for result in results if result.success)
+        return CreateComments(
+            results=results,
+            success=created == len(comments),
+            message=f"{created} of {len(comments)} comments created."
+        )
+
+
 class Query(graphene.ObjectType):
-    all_comments = graphene.List(CommentType)
+    all_comments = graphene.Field(
+        CommentConnection,
+        first=graphene.Int(),
+        after=graphene.String(),
+        task=graphene.ID(),
+        user=graphene.ID()
+    )
     comment = graphene.Field(CommentType, id=graphene.ID())
+    comments_for_task = graphene.Field(
+        CommentConnection,
+        task_id=graphene.ID(required=True),
+        first=graphene.Int(),
+        after=graphene.String()
+    )
 
-    def resolve_all_comments(self, info):
-        return models.Comment.objects.all()
+    def resolve_all_comments(self, info, first=None, after=None, **filters):
+        return paginate(models.Comment.objects.filter(**filters), info, CommentConnection, first, after)
 
     def resolve_comment(self, info, id):
-        try:
-            return models.Comment.objects.get(id=id)
-        except models.Comment.DoesNotExist:
-            return GraphQLError("Comment not found.")
+        return get_one(info, models.Comment.objects.all(), id, "Comment not found.")
+
+    def resolve_comments_for_task(self, info, task_id, first=None, after=None):
+        # served by the partial index comments_live_task_idx on (task, created_at, id) of live comments
+        if bulk.parse_id(task_id) is None:
+            raise GraphQLError("Invalid task id.")
+        comments = models.Comment.objects.filter(task_id=bulk.parse_id(task_id))
+        return paginate(comments, info, CommentConnection, first, after)
 
 class Mutation(graphene.ObjectType):
     create_comment = CreateComment.Field()
     update_comment = UpdateComment.Field()
+    create_comments = CreateComments.Field()
+
+
+class Subscription(graphene.ObjectType):
+    comment_added = graphene.Field(CommentType, task_id=graphene.ID(), epic_id=graphene.ID())
 
+    def subscribe_comment_added(root, info, task_id=None, epic_id=None):
+        return listen("task.comment", kinds={CREATED}, task_id=task_id, epic_id=epic_id)
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+    def resolve_comment_added(root, info, **filters):
+        reset_loaders(info)
+        return root.instance
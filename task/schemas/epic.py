@@ -1,14 +1,19 @@
 import graphene
 from django.db import IntegrityError
 from graphene_django import DjangoObjectType
-from graphql import GraphQLError
 from task.schemas.task import TaskType
 from task import models
+from task.loaders import get_one, load_relation, reset_loaders
+from task.pagination import page_size, paginate
+from task.subscriptions import CREATED, UPDATED, listen
 
 
 class EpicType(DjangoObjectType):
-    tasks = graphene.List(TaskType)
-    task_count = graphene.Int()
+    tasks = graphene.List(TaskType, first=graphene.Int())
+
+    field_costs = {
+        "tasks": 2
+    }
 
     class Meta:
         model = models.Epic
@@ -16,16 +21,21 @@ class EpicType(DjangoObjectType):
             "id",
             "name",
             "is_completed",
+            "task_count",
+            "completed_task_count",
+            "open_task_count",
+            "subtask_count",
             "created_at",
-            "updated_at",
-            "is_completed"
+            "updated_at"
         )
 
-    def resolve_tasks(self, info):
-        return models.Task.objects.filter(epic=self)
+    def resolve_tasks(self, info, first=None):
+        return load_relation(info, self, "tasks", "tasks_by_epic", self.id, page_size(first))
+
 
-    def resolve_task_count(self, info):
-        return models.Task.objects.filter(epic=self).count()
+class EpicConnection(graphene.relay.Connection):
+    class Meta:
+        node = EpicType
 
 
 class CreateEpic(graphene.Mutation):
@@ -113,18 +123,32 @@ class UpdateEpic(graphene.Mutation):
 
 
 class Query(graphene.ObjectType):
-    all_epics = graphene.List(EpicType)
+    all_epics = graphene.Field(
+        EpicConnection,
+        first=graphene.Int(),
+        after=graphene.String(),
+        user=graphene.ID(),
+        is_completed=graphene.Boolean()
+    )
     epic = graphene.Field(EpicType, id=graphene.ID(required=True))
 
-    def resolve_all_epics(self, info):
-        return models.Epic.objects.all()
+    def resolve_all_epics(self, info, first=None, after=None, **filters):
+        return paginate(models.Epic.objects.filter(**filters), info, EpicConnection, first, after)
 
     def resolve_epic(self, info, id):
-        try:
-            return models.Epic.objects.get(id=id)
-        except models.Epic.DoesNotExist:
-            raise GraphQLError("Epic with the given ID does not exist.")
+        return get_one(info, models.Epic.objects.all(), id, "Epic with the given ID does not exist.")
 
 
 class Mutation(graphene.ObjectType):
     create_epic = CreateEpic.Field()
+
+
+class Subscription(graphene.ObjectType):
+    epic_updated = graphene.Field(EpicType, epic_id=graphene.ID(), user_id=graphene.ID())
+
+    def subscribe_epic_updated(root, info, epic_id=None, user_id=None):
+        return listen("task.epic", kinds={CREATED, UPDATED}, id=epic_id, user_id=user_id)
+
+    def resolve_epic_updated(root, info, **filters):
+        reset_loaders(info)
+        return root.instance
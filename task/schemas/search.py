@@ -0,0 +1,92 @@
+import graphene
+from asgiref.sync import sync_to_async
+from graphql import GraphQLError
+from task import bulk, models
+from task.loaders import get_loaders
+from task.pagination import decode_offset_cursor, encode_offset_cursor, page_size
+from task.response_cache import list_tag
+from task.schemas.comment import CommentType
+from task.schemas.task import TaskType
+from task.search import search
+
+
+class SearchHitType(graphene.ObjectType):
+    kind = graphene.String()
+    rank = graphene.Float()
+    snippet = graphene.String()
+    task = graphene.Field(TaskType)
+    comment = graphene.Field(CommentType)
+
+    def resolve_task(self, info):
+        return get_loaders(info).tasks.load(self.task_id)
+
+    def resolve_comment(self, info):
+        if self.kind != "comment":
+            return None
+        return get_loaders(info).comments.load(self.pk)
+
+
+class SearchConnection(graphene.relay.Connection):
+    class Meta:
+        node = SearchHitType
+
+
+def build_search_connection(hits, loaders, size, offset):
+    has_next_page = len(hits) > size
+    hits = hits[:size]
+    loaders.tasks.prime([hit.task_id for hit in hits])
+    loaders.comments.prime([hit.pk for hit in hits if hit.kind == "comment"])
+
+    edges = [
+        SearchConnection.Edge(node=hit, cursor=encode_offset_cursor(offset + index + 1))
+        for index, hit in enumerate(hits)
+    ]
+    return SearchConnection(
+        edges=edges,
+        page_info=graphene.relay.PageInfo(
+            has_next_page=has_next_page,
+            has_previous_page=offset > 0,
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None
+        )
+    )
+
+
+class Query(graphene.ObjectType):
+    search = graphene.Field(
+        SearchConnection,
+        query=graphene.String(required=True),
+        epic=graphene.ID(),
+        assignee=graphene.ID(),
+        first=graphene.Int(),
+        after=graphene.String()
+    )
+
+    def resolve_search(self, info, query, epic=None, assignee=None, first=None, after=None):
+        text = query.strip()
+        if not text:
+            raise GraphQLError("Search query cannot be empty.")
+        if epic is not None and bulk.parse_id(epic) is None:
+            raise GraphQLError("Invalid epic id.")
+        if assignee is not None and bulk.parse_id(assignee) is None:
+            raise GraphQLError("Invalid assignee id.")
+
+        epic = bulk.parse_id(epic)
+        assignee = bulk.parse_id(assignee)
+        size = page_size(first)
+        offset = decode_offset_cursor(after) if after else 0
+
+        # hits are not model rows, so tag the tables explicitly: any task or comment write may change them
+        tags = getattr(info.context, "cache_tags", None)
+        if tags is not None:
+            tags.update({list_tag(models.Task), list_tag(models.Comment)})
+
+        loaders = get_loaders(info)
+        if loaders.is_async:
+            return _asearch(text, epic, assignee, loaders, size, offset)
+        return build_search_connection(search(text, epic, assignee, size + 1, offset), loaders, size, offset)
+
+
+async def _asearch(text, epic, assignee, loaders, size, offset):
+    hits = await sync_to_async(search)(text, epic, assignee, size + 1, offset)
+    return build_search_connection(hits, loaders, size, offset)
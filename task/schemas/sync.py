@@ -0,0 +1,37 @@
+import graphene
+from task.schemas.comment import CommentType
+from task.schemas.epic import EpicType
+from task.schemas.task import TaskType
+from task.schemas.user import JiraUserType
+from task.sync import changes_since
+
+
+class DeletionType(graphene.ObjectType):
+    model = graphene.String()
+    id = graphene.ID()
+
+
+class SyncPageType(graphene.ObjectType):
+    users = graphene.List(JiraUserType)
+    epics = graphene.List(EpicType)
+    tasks = graphene.List(TaskType)
+    comments = graphene.List(CommentType)
+    deleted = graphene.List(DeletionType)
+    cursor = graphene.String()
+    has_more = graphene.Boolean()
+
+    # first bounds the rows of all lists together
+    field_sizes = {
+        "users": 1,
+        "epics": 1,
+        "tasks": 1,
+        "comments": 1,
+        "deleted": 1
+    }
+
+
+class Query(graphene.ObjectType):
+    changes_since = graphene.Field(SyncPageType, cursor=graphene.String(), first=graphene.Int())
+
+    def resolve_changes_since(self, info, cursor=None, first=None):
+        return changes_since(info, cursor, first)
@@ -1,10 +1,30 @@
 import graphene
-from django.db import IntegrityError
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from graphene_django import DjangoObjectType
-from graphql import GraphQLError
-from task import models
+from task import bulk, models
+from task.loaders import get_loaders, get_one, load_relation, reset_loaders
+from task.pagination import page_size, paginate
+from task.response_cache import invalidate_instances
+from task.subscriptions import CREATED, DELETED, UPDATED, listen, publish_changes
+from task.tree import load_ancestors, load_tree
 
 class TaskType(DjangoObjectType):
+    subtasks = graphene.List(lambda: TaskType, first=graphene.Int())
+    comments = graphene.List("task.schemas.comment.CommentType", first=graphene.Int())
+    comment_count = graphene.Int()
+
+    field_costs = {
+        "epic": 1,
+        "owner": 1,
+        "assignee": 1,
+        "parent_task": 1,
+        "subtasks": 2,
+        "comments": 2,
+        "comment_count": 1
+    }
+
     class Meta:
         model = models.Task
         fields = (
@@ -21,6 +41,48 @@ class TaskType(DjangoObjectType):
             "is_completed"
         )
 
+    def resolve_epic(self, info):
+        return load_relation(info, self, "epic", "epics", self.epic_id)
+
+    def resolve_owner(self, info):
+        return load_relation(info, self, "owner", "users", self.owner_id)
+
+    def resolve_assignee(self, info):
+        return load_relation(info, self, "assignee", "users", self.assignee_id)
+
+    def resolve_parent_task(self, info):
+        return load_relation(info, self, "parent_task", "tasks", self.parent_task_id)
+
+    def resolve_subtasks(self, info, first=None):
+        return load_relation(info, self, "subtasks", "subtasks_by_parent", self.id, page_size(first))
+
+    def resolve_comments(self, info, first=None):
+        return load_relation(info, self, "comments", "comments_by_task", self.id, page_size(first))
+
+    def resolve_comment_count(self, info):
+        return get_loaders(info).comment_counts.load(self.id)
+
+class TaskConnection(graphene.relay.Connection):
+    class Meta:
+        node = TaskType
+
+class TaskTreeNode(graphene.ObjectType):
+    task = graphene.Field(TaskType)
+    depth = graphene.Int()
+    children = graphene.List(lambda: TaskTreeNode)
+
+class ChangeKind(graphene.Enum):
+    CREATED = CREATED
+    UPDATED = UPDATED
+    DELETED = DELETED
+
+class TaskChangeType(graphene.ObjectType):
+    kind = graphene.Field(ChangeKind)
+    task = graphene.Field(TaskType)
+
+    def resolve_task(self, info):
+        return self.instance
+
 class CreateTask(graphene.Mutation):
     class Arguments:
         name = graphene.String(required=True)
@@ -130,24 +192,243 @@ class UpdateTask(graphene.Mutation):
             )
 
 
+class TaskInput(graphene.InputObjectType):
+    name = graphene.String(required=True)
+    description = graphene.String(required=True)
+    epic = graphene.ID(required=True)
+    owner = graphene.ID(required=True)
+    assignee = graphene.ID(required=True)
+    task_type = graphene.String()
+    parent_task = graphene.ID()
+    is_completed = graphene.Boolean()
+
+
+class TaskUpdateInput(graphene.InputObjectType):
+    id = graphene.ID(required=True)
+    name = graphene.String()
+    description = graphene.String()
+    assignee = graphene.ID()
+    parent_task = graphene.ID()
+    is_completed = graphene.Boolean()
+
+
+class TaskResult(graphene.ObjectType):
+    index = graphene.Int()
+    task = graphene.Field(TaskType)
+    success = graphene.Boolean(default_value=False)
+    message = graphene.String(default_value="")
+
+
+class CreateTasks(graphene.Mutation):
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(TaskInput), required=True)
+
+    results = graphene.List(TaskResult)
+    success = graphene.Boolean(default_value=False)
+    message = graphene.String(default_value="")
+
+    def mutate(self, info, tasks):
+        epics = bulk.fetch_by_ids(models.Epic, [item.epic for item in tasks])
+        users = bulk.fetch_by_ids(models.JiraUser, [item.owner for item in tasks] + [item.assignee for item in tasks])
+        parents = bulk.fetch_by_ids(models.Task, [item.parent_task for item in tasks])
+        existing = set(
+            models.Task.objects.filter(
+                epic_id__in=list(epics), name__in={item.name for item in tasks}
+            ).values_list("name", "epic_id")
+        )
+
+        results = []
+        pending = []
+        for index, item in enumerate(tasks):
+            epic = bulk.lookup(epics, item.epic)
+            owner = bulk.lookup(users, item.owner)
+            assignee = bulk.lookup(users, item.assignee)
+            parent_task = bulk.lookup(parents, item.parent_task)
+
+            if epic is None:
+                results.append(TaskResult(index=index, message="Epic does not exist"))
+                continue
+            if owner is None or assignee is None:
+                results.append(TaskResult(index=index, message="User does not exist"))
+                continue
+            if item.parent_task is not None and parent_task is None:
+                results.append(TaskResult(index=index, message="Parent Task does not exist"))
+                continue
+            if (item.name, epic.pk) in existing:
+                results.append(TaskResult(index=index, message="Task already exists in this epic"))
+                continue
+
+            task = models.Task(
+                name=item.name,
+                description=item.description,
+                epic=epic,
+                owner=owner,
+                assignee=assignee,
+                parent_task=parent_task,
+                is_completed=bool(item.is_completed)
+            )
+            if item.task_type:
+                task.task_type = item.task_type
+            try:
+                task.clean()
+            except ValidationError as e:
+                results.append(TaskResult(index=index, message=" ".join(e.messages)))
+                continue
+
+            existing.add((item.name, epic.pk))
+            result = TaskResult(index=index, task=task, success=True, message="Task created successfully")
+            results.append(result)
+            pending.append(task)
+
+        try:
+            with transaction.atomic():
+                models.Task.objects.bulk_create(pending)
+                models.Epic.refresh_counters({task.epic_id for task in pending})
+                models.Epic.reload_counters(epics.values())
+                invalidate_instances(pending)
+                publish_changes(pending, CREATED)
+        except IntegrityError as e:
+            for result in results:
+                if result.success:
+                    result.task, result.success, result.message = None, False, str(e)
+
+        created = sum(1 for result in results if result.success)
+        return CreateTasks(
+            results=results,
+            success=created == len(tasks),
+            message=f"{created} of {len(tasks)} tasks created"
+        )
+
+
+class UpdateTasks(graphene.Mutation):
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(TaskUpdateInput), required=True)
+
+    results = graphene.List(TaskResult)
+    success = graphene.Boolean(default_value=False)
+    message = graphene.String(default_value="")
+
+    def mutate(self, info, tasks):
+        instances = bulk.fetch_by_ids(models.Task, [item.id for item in tasks])
+        users = bulk.fetch_by_ids(models.JiraUser, [item.assignee for item in tasks])
+        parents = bulk.fetch_by_ids(models.Task, [item.parent_task for item in tasks])
+        renamed = [item for item in tasks if item.name and bulk.lookup(instances, item.id)]
+        taken = set(
+            models.Task.objects.filter(
+                epic_id__in={bulk.lookup(instances, item.id).epic_id for item in renamed},
+                name__in={item.name for item in renamed}
+            ).values_list("name", "epic_id")
+        ) if renamed else set()
+
+        now = timezone.now()
+        fields = {"updated_at"}
+        results = []
+        pending = {}
+        seen = set()
+        for index, item in enumerate(tasks):
+            task = bulk.lookup(instances, item.id)
+            if task is None:
+                results.append(TaskResult(index=index, message="Task does not exist"))
+                continue
+            # entries share one instance per row, so a second entry could leave a rejected value in the first
+            if task.pk in seen:
+                results.append(TaskResult(index=index, message="Task appears more than once in this batch"))
+                continue
+            seen.add(task.pk)
+
+            # every check runs before the instance is touched, so a rejected entry changes nothing
+            changes = {}
+            if item.assignee:
+                assignee = bulk.lookup(users, item.assignee)
+                if assignee is None:
+                    results.append(TaskResult(index=index, message="User does not exist"))
+                    continue
+                changes["assignee"] = assignee
+            if item.parent_task:
+                parent_task = bulk.lookup(parents, item.parent_task)
+                if parent_task is None:
+                    results.append(TaskResult(index=index, message="Parent Task does not exist"))
+                    continue
+                changes["parent_task"] = parent_task
+            if item.name and item.name != task.name:
+                if (item.name, task.epic_id) in taken:
+                    results.append(TaskResult(index=index, message="Task already exists in this epic"))
+                    continue
+                taken.add((item.name, task.epic_id))
+                changes["name"] = item.name
+            if item.description:
+                changes["description"] = item.description
+            if item.is_completed is not None:
+                changes["is_completed"] = item.is_completed
+
+            for name, value in changes.items():
+                setattr(task, name, value)
+            fields.update(changes)
+            task.updated_at = now
+            results.append(TaskResult(index=index, task=task, success=True, message="Task updated successfully"))
+            pending[task.pk] = task
+
+        try:
+            with transaction.atomic():
+                models.Task.objects.bulk_update(list(pending.values()), sorted(fields))
+                if fields & {"is_completed", "parent_task"}:
+                    models.Epic.refresh_counters({task.epic_id for task in pending.values()})
+                invalidate_instances(pending.values())
+                publish_changes(pending.values(), UPDATED)
+        except IntegrityError as e:
+            for result in results:
+                if result.success:
+                    result.task, result.success, result.message = None, False, str(e)
+
+        updated = sum(1 for result in results if result.success)
+        return UpdateTasks(
+            results=results,
+            success=updated == len(tasks),
+            message=f"{updated} of {len(tasks)} tasks updated"
+        )
+
+
 class Query(graphene.ObjectType):
-    all_tasks = graphene.List(TaskType)
+    all_tasks = graphene.Field(
+        TaskConnection,
+        first=graphene.Int(),
+        after=graphene.String(),
+        epic=graphene.ID(),
+        assignee=graphene.ID(),
+        is_completed=graphene.Boolean(),
+        task_type=graphene.String()
+    )
     task = graphene.Field(TaskType, id=graphene.ID(required=True))
+    task_tree = graphene.Field(TaskTreeNode, root_id=graphene.ID(required=True), max_depth=graphene.Int())
+    task_ancestors = graphene.List(TaskType, id=graphene.ID(required=True))
 
 
-    def resolve_all_tasks(self, info):
-        return models.Task.objects.all()
+    def resolve_all_tasks(self, info, first=None, after=None, **filters):
+        return paginate(models.Task.objects.filter(**filters), info, TaskConnection, first, after)
 
     def resolve_task(self, info, id):
-        try:
-            return models.Task.objects.get(id=id)
-        except models.Task.DoesNotExist:
-            raise GraphQLError("Task with the given ID does not exist.")
+        return get_one(info, models.Task.objects.all(), id, "Task with the given ID does not exist.")
+
+    def resolve_task_tree(self, info, root_id, max_depth=None):
+        return load_tree(info, root_id, max_depth)
+
+    def resolve_task_ancestors(self, info, id):
+        return load_ancestors(info, id)
 
 
 class Mutation(graphene.ObjectType):
     create_task = CreateTask.Field()
     update_task = UpdateTask.Field()
+    create_tasks = CreateTasks.Field()
+    update_tasks = UpdateTasks.Field()
+
+
+class Subscription(graphene.ObjectType):
+    task_changed = graphene.Field(TaskChangeType, epic_id=graphene.ID(), assignee_id=graphene.ID())
 
+    def subscribe_task_changed(root, info, epic_id=None, assignee_id=None):
+        return listen("task.task", epic_id=epic_id, assignee_id=assignee_id)
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+    def resolve_task_changed(root, info, **filters):
+        reset_loaders(info)
+        return root
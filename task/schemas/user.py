@@ -1,14 +1,20 @@
 import graphene
 from django.db import IntegrityError
 from graphene_django import DjangoObjectType
-from graphql import GraphQLError
 from task import models
-from resources.all_purpose import common
+from task.loaders import get_loaders, get_one, load_relation
+from task.pagination import page_size, paginate
+from resources.all_purpose.common import convert_raw_password_to_hash
+from resources.all_purpose.hashing import hasher, HashingBusyError
 from task.schemas.epic import EpicType
 
 
 class JiraUserType(DjangoObjectType):
-    epics = graphene.List(EpicType)
+    epics = graphene.List(EpicType, first=graphene.Int())
+
+    field_costs = {
+        "epics": 2
+    }
 
     class Meta:
         model = models.JiraUser
@@ -24,8 +30,13 @@ class JiraUserType(DjangoObjectType):
             "updated_at"
         )
 
-    def resolve_epics(self, info):
-        return models.Epic.objects.filter(epic=self)
+    def resolve_epics(self, info, first=None):
+        return load_relation(info, self, "epics", "epics_by_user", self.id, page_size(first))
+
+
+class JiraUserConnection(graphene.relay.Connection):
+    class Meta:
+        node = JiraUserType
 
 
 class CreateUser(graphene.Mutation):
@@ -43,28 +54,35 @@ class CreateUser(graphene.Mutation):
     message = graphene.String(default_value="")
 
     def mutate(self, info, first_name, last_name, user_name, email, password, mobile_number, role):
+        fields = {
+            "first_name": first_name,
+            "last_name": last_name,
+            "user_name": user_name,
+            "email": email,
+            "mobile_number": mobile_number,
+            "role": role
+        }
+        if get_loaders(info).is_async:
+            return _acreate_user(password, fields)
+
+        # a WSGI worker waits for the response either way, so the hash runs on the request thread
         try:
-            hashed_password = common.convert_raw_password_to_hash(password)
-            user = models.JiraUser.objects.create(
-                first_name=first_name,
-                last_name=last_name,
-                user_name=user_name,
-                email=email,
-                password=hashed_password,
-                mobile_number=mobile_number,
-                role=role
-            )
-            return CreateUser(
-                user=user,
-                success=True,
-                message="User created successfully"
-            )
+            user = models.JiraUser.objects.create(password=convert_raw_password_to_hash(password), **fields)
         except IntegrityError:
-            return CreateUser(
-                user=None,
-                success=False,
-                message="User already exists"
-            )
+            return CreateUser(user=None, success=False, message="User already exists")
+        return CreateUser(user=user, success=True, message="User created successfully")
+
+
+async def _acreate_user(password, fields):
+    """ Hashes on the worker pool without holding the event loop or the thread shared by sync mutations """
+    try:
+        hashed_password = await hasher.ahash(password)
+        user = await models.JiraUser.objects.acreate(password=hashed_password, **fields)
+    except IntegrityError:
+        return CreateUser(user=None, success=False, message="User already exists")
+    except HashingBusyError as e:
+        return CreateUser(user=None, success=False, message=str(e))
+    return CreateUser(user=user, success=True, message="User created successfully")
 
 
 class UpdateUser(graphene.Mutation):
@@ -135,22 +153,21 @@ class UpdateUser(graphene.Mutation):
 
 
 class Query(graphene.ObjectType):
-    all_users = graphene.List(JiraUserType)
+    all_users = graphene.Field(
+        JiraUserConnection,
+        first=graphene.Int(),
+        after=graphene.String(),
+        role=graphene.String()
+    )
     user = graphene.Field(JiraUserType, id=graphene.ID(required=True))
 
-    def resolve_all_users(self, info):
-        return models.JiraUser.objects.all()
+    def resolve_all_users(self, info, first=None, after=None, **filters):
+        return paginate(models.JiraUser.objects.filter(**filters), info, JiraUserConnection, first, after)
 
     def resolve_user(self, info, id):
-        try:
-            return models.JiraUser.objects.get(id=id)
-        except models.JiraUser.DoesNotExist:
-            raise GraphQLError("User with the given ID does not exist.")
+        return get_one(info, models.JiraUser.objects.all(), id, "User with the given ID does not exist.")
 
 
 class Mutation(graphene.ObjectType):
     create_user = CreateUser.Field()
     update_user = UpdateUser.Field()
-
-
-schema = graphene.Schema(query=Query, mutation=Mutation)
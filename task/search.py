@@ -0,0 +1,119 @@
+import re
+from django.db import connections, router
+from django.db.models import Q
+from resources.all_purpose import constant
+from task import models
+
+
+class Hit:
+    """ One ranked match: a task, or a comment together with the id of its task """
+
+    def __init__(self, kind, pk, task_id, rank, snippet):
+        self.kind = kind
+        self.pk = pk
+        self.task_id = task_id
+        self.rank = rank
+        self.snippet = snippet
+
+
+def task_filters(alias, epic, assignee):
+    clauses, params = [], []
+    if epic is not None:
+        clauses.append(f"{alias}.epic_id = %s")
+        params.append(epic)
+    if assignee is not None:
+        clauses.append(f"{alias}.assignee_id = %s")
+        params.append(assignee)
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def search(text, epic=None, assignee=None, limit=constant.DEFAULT_PAGE_SIZE, offset=0):
+    """ Returns up to `limit` hits over task names/descriptions and live comments, best first """
+    # raw SQL bypasses the router, so ask it which connection reads go to (a replica for queries)
+    connection = connections[router.db_for_read(models.Task) or "default"]
+    if connection.vendor != "postgresql":
+        return substring_search(text, epic, assignee, limit, offset)
+
+    hits = fulltext_search(connection, text, epic, assignee, limit, offset)
+    if not hits and offset == 0:
+        # nothing matched as words; try names that look alike (typos, partial words)
+        hits = fuzzy_search(connection, text, epic, assignee, limit)
+    return hits
+
+
+def fulltext_search(connection, text, epic, assignee, limit, offset):
+    filters, filter_params = task_filters("t", epic, assignee)
+    # rank and page first, so ts_headline only runs for the rows returned
+    sql = f"""
+        WITH q AS (SELECT websearch_to_tsquery(%s, %s) AS query),
+        hits AS (
+            SELECT 'task' AS kind, t.id, t.id AS task_id, ts_rank_cd(t.search_vector, q.query) AS rank
+            FROM tasks t, q
+            WHERE t.search_vector @@ q.query{filters}
+            UNION ALL
+            SELECT 'comment', c.id, c.task_id, ts_rank_cd(c.search_vector, q.query)
+            FROM comments c JOIN tasks t ON t.id = c.task_id, q
+            WHERE NOT c.is_deleted AND c.search_vector @@ q.query{filters}
+            ORDER BY rank DESC, kind DESC, id
+            LIMIT %s OFFSET %s
+        )
+        SELECT hits.kind, hits.id, hits.task_id, hits.rank, ts_headline(
+            %s,
+            CASE WHEN hits.kind = 'task' THEN t.name || ' - ' || t.description ELSE c.comment END,
+            q.query,
+            %s
+        )
+        FROM hits CROSS JOIN q
+        JOIN tasks t ON t.id = hits.task_id
+        LEFT JOIN comments c ON hits.kind = 'comment' AND c.id = hits.id
+        ORDER BY hits.rank DESC, hits.kind DESC, hits.id
+    """
+    params = [
+        constant.SEARCH_CONFIG, text, *filter_params, *filter_params, limit, offset,
+        constant.SEARCH_CONFIG, constant.SEARCH_HEADLINE_OPTIONS
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [Hit(*row) for row in cursor.fetchall()]
+
+
+def fuzzy_search(connection, text, epic, assignee, limit):
+    filters, filter_params = task_filters("t", epic, assignee)
+    # the % operator is what tasks_name_trgm_idx serves; its cut-off is pg_trgm.similarity_threshold (0.3)
+    sql = f"""
+        SELECT 'task', t.id, t.id, similarity(t.name, %s) AS rank, t.name
+        FROM tasks t
+        WHERE t.name %% %s{filters}
+        ORDER BY rank DESC, t.id
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [text, text, *filter_params, limit])
+        return [Hit(*row) for row in cursor.fetchall()]
+
+
+def substring_search(text, epic, assignee, limit, offset):
+    """ Unranked case-insensitive matching for databases without full-text search (SQLite benchmarks) """
+    tasks = models.Task.objects.filter(Q(name__icontains=text) | Q(description__icontains=text))
+    comments = models.Comment.objects.filter(comment__icontains=text)
+    if epic is not None:
+        tasks, comments = tasks.filter(epic=epic), comments.filter(task__epic=epic)
+    if assignee is not None:
+        tasks, comments = tasks.filter(assignee=assignee), comments.filter(task__assignee=assignee)
+
+    end = offset + limit
+    hits = [
+        Hit("task", pk, pk, 0.0, highlight(f"{name} - {description}", text))
+        for pk, name, description in tasks.order_by("id").values_list("id", "name", "description")[:end]
+    ] + [
+        Hit("comment", pk, task_id, 0.0, highlight(comment, text))
+        for pk, task_id, comment in comments.order_by("id").values_list("id", "task_id", "comment")[:end]
+    ]
+    return hits[offset:end]
+
+
+def highlight(value, text):
+    match = re.search(re.escape(text), value, re.IGNORECASE)
+    start = max(0, match.start() - constant.SEARCH_SNIPPET_LENGTH // 2) if match else 0
+    excerpt = value[start:start + constant.SEARCH_SNIPPET_LENGTH]
+    return re.sub(re.escape(text), lambda found: f"<b>{found.group(0)}</b>", excerpt, flags=re.IGNORECASE)
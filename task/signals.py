@@ -0,0 +1,46 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from task import models
+from task.profiling import count_connection, install_sql_recorder
+from task.response_cache import invalidate_instances
+from task.subscriptions import CREATED, DELETED, UPDATED, publish_changes
+
+CACHED_MODELS = (models.JiraUser, models.Epic, models.Task, models.Comment)
+
+
+def saved(sender, instance, created, raw=False, **kwargs):
+    invalidate_instances([instance])
+    if not raw:
+        publish_changes([instance], CREATED if created else UPDATED)
+
+
+def deleted(sender, instance, **kwargs):
+    """ Runs for cascades and queryset deletes too; the batch writes tombstones and counters once per delete """
+    batch = models.DeleteBatch.current()
+    if batch is not None:
+        batch.add(instance)
+        return
+    # a delete that did not go through the board's models or managers, e.g. a raw Collector
+    batch = models.DeleteBatch()
+    batch.add(instance)
+    batch.flush()
+
+
+# explicit senders: a receiver without one would disable fast deletes for every model in the project
+for model in CACHED_MODELS:
+    post_save.connect(saved, sender=model, dispatch_uid=f"{model._meta.label_lower}.saved")
+    post_delete.connect(deleted, sender=model, dispatch_uid=f"{model._meta.label_lower}.deleted")
+
+
+@receiver(models.rows_deleted, sender=models.DeleteBatch)
+def release_deleted(sender, rows, **kwargs):
+    """ Lets cached responses and subscribers drop every row of the delete at once """
+    invalidate_instances(rows)
+    publish_changes(rows, DELETED)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    count_connection(connection.alias)
+    install_sql_recorder(connection)
@@ -0,0 +1,146 @@
+import asyncio
+import copy
+import threading
+from collections import defaultdict
+from functools import partial
+from django.db import transaction
+from django.db.models import DEFERRED
+from graphql import GraphQLError
+from resources.all_purpose import constant
+from task import models
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+OVERFLOW = object()
+
+# columns subscribers can filter on, per topic
+FILTERS = {
+    "task.task": ("id", "epic_id", "assignee_id"),
+    "task.comment": ("id", "task_id", "user_id"),
+    "task.epic": ("id", "user_id")
+}
+
+
+class Change:
+    """ One committed write as delivered to subscribers; keys hold the old and new value of every filter column """
+
+    def __init__(self, kind, instance, keys):
+        self.kind = kind
+        self.instance = instance
+        self.keys = keys
+
+    def matches(self, **filters):
+        return all(value in self.keys.get(name, ()) for name, value in filters.items())
+
+
+class Listener:
+    """ The queue of one subscription, fed from any thread through its event loop """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(constant.SUBSCRIPTION_QUEUE_SIZE)
+
+    def deliver(self, change):
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # a client that cannot keep up gets an error and re-queries, instead of buffering without bound
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+
+class Broker:
+    """ In-process fan-out of committed writes to the subscriptions of this worker """
+
+    def __init__(self):
+        self._topics = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def has_subscribers(self, topic):
+        return bool(self._topics.get(topic))
+
+    def subscribe(self, topic):
+        listener = Listener(asyncio.get_running_loop())
+        with self._lock:
+            self._topics[topic].add(listener)
+        return listener
+
+    def unsubscribe(self, topic, listener):
+        with self._lock:
+            self._topics[topic].discard(listener)
+
+    def publish(self, topic, change):
+        with self._lock:
+            listeners = list(self._topics.get(topic, ()))
+        for listener in listeners:
+            try:
+                listener.loop.call_soon_threadsafe(listener.deliver, change)
+            except RuntimeError:
+                # the loop of a server that is shutting down
+                self.unsubscribe(topic, listener)
+
+
+broker = Broker()
+
+
+async def listen(topic, kinds=None, **filters):
+    """ Yields the Changes of a topic that match the filters until the subscriber goes away """
+    try:
+        filters = {name: int(value) for name, value in filters.items() if value is not None}
+    except ValueError:
+        raise GraphQLError("Subscription filters must be integer ids.")
+
+    listener = broker.subscribe(topic)
+    try:
+        while True:
+            change = await listener.queue.get()
+            if change is OVERFLOW:
+                raise GraphQLError("Subscription fell behind and was dropped; re-query and subscribe again.")
+            if (kinds is None or change.kind in kinds) and change.matches(**filters):
+                yield change
+    finally:
+        broker.unsubscribe(topic, listener)
+
+
+def topic_of(model):
+    return model._meta.label_lower
+
+
+def filter_keys(instance, columns):
+    loaded = getattr(instance, "_loaded_values", {})
+    keys = {}
+    for column in columns:
+        values = {getattr(instance, column), loaded.get(column)}
+        keys[column] = {value for value in values if value is not None and value is not DEFERRED}
+    return keys
+
+
+def comment_epics(comments):
+    """ epic_id of every comment's task, reading only the tasks that are not already cached """
+    missing = {comment.task_id for comment in comments if not models.Comment.task.is_cached(comment)}
+    epics = dict(models.Task.objects.filter(pk__in=missing).values_list("pk", "epic_id")) if missing else {}
+    return {
+        comment.pk: comment.task.epic_id if models.Comment.task.is_cached(comment) else epics.get(comment.task_id)
+        for comment in comments
+    }
+
+
+def publish_changes(instances, kind):
+    """ Queues the writes for subscribers once the transaction commits; free when nobody subscribed """
+    instances = [instance for instance in instances if broker.has_subscribers(topic_of(type(instance)))]
+    if not instances:
+        return
+
+    comments = [instance for instance in instances if isinstance(instance, models.Comment)]
+    epics = comment_epics(comments) if comments else {}
+    for instance in instances:
+        model = type(instance)
+        keys = filter_keys(instance, FILTERS[topic_of(model)])
+        if isinstance(instance, models.Comment):
+            keys["epic_id"] = {epics.get(instance.pk)} - {None}
+        # a copy, so later changes by the writing request do not leak into what subscribers resolve
+        change = Change(kind, copy.copy(instance), keys)
+        transaction.on_commit(partial(broker.publish, topic_of(model), change))
@@ -0,0 +1,149 @@
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime, timedelta
+from django.db.models import Q
+from django.utils import timezone
+from graphql import GraphQLError
+from resources.all_purpose import constant
+from task import models
+from task.loaders import get_loaders
+from task.pagination import page_size
+from task.response_cache import list_tag
+
+# ties on the timestamp are broken by this order, so parents come before their children;
+# soft-deleted comments are read too, clients have to learn about those deletions
+SOURCES = (
+    ("users", models.JiraUser.objects, "updated_at"),
+    ("epics", models.Epic.objects, "updated_at"),
+    ("tasks", models.Task.objects, "updated_at"),
+    ("comments", models.Comment.all_objects, "updated_at"),
+    ("deleted", models.Tombstone.objects, "deleted_at")
+)
+
+
+class Deletion:
+    """ A row the client must drop: a tombstone, or a soft-deleted comment """
+
+    def __init__(self, model, object_id):
+        self.model = model
+        self.id = object_id
+
+
+class SyncPage:
+    def __init__(self, cursor, has_more):
+        self.cursor = cursor
+        self.has_more = has_more
+        self.users = []
+        self.epics = []
+        self.tasks = []
+        self.comments = []
+        self.deleted = []
+
+
+def encode_watermark(timestamp, source, pk):
+    raw = json.dumps([timestamp.isoformat(), source, pk])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_watermark(cursor):
+    try:
+        timestamp, source, pk = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+        return datetime.fromisoformat(timestamp), int(source), int(pk)
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise GraphQLError("Invalid cursor.")
+
+
+def after(index, column, watermark):
+    """ Rows of source `index` past the (timestamp, source, id) watermark """
+    if watermark is None:
+        return Q()
+    timestamp, source, pk = watermark
+    if index > source:
+        return Q(**{f"{column}__gte": timestamp})
+    if index < source:
+        return Q(**{f"{column}__gt": timestamp})
+    return Q(**{f"{column}__gt": timestamp}) | Q(**{column: timestamp, "id__gt": pk})
+
+
+def source_queries(watermark, until, size):
+    """ One keyset query per table, each reading at most a page plus one probe row """
+    for index, (_, manager, column) in enumerate(SOURCES):
+        yield (
+            index,
+            column,
+            manager.filter(after(index, column, watermark), **{f"{column}__lte": until})
+            .order_by(column, "id")[:size + 1]
+        )
+
+
+def merge(sources, size):
+    """ The first `size` rows of all sources in (timestamp, source, id) order, and whether more remain """
+    rows = heapq.merge(*(
+        [(getattr(row, column), index, row.pk, row) for row in queryset]
+        for index, column, queryset in sources
+    ), key=lambda entry: entry[:3])
+    page = []
+    for entry in rows:
+        if len(page) == size:
+            return page, True
+        page.append(entry)
+    return page, False
+
+
+def build_page(entries, watermark, has_more, loaders):
+    last = entries[-1][:3] if entries else watermark
+    page = SyncPage(encode_watermark(*last) if last else None, has_more)
+    for _, index, _, row in entries:
+        name = SOURCES[index][0]
+        if name == "deleted":
+            page.deleted.append(Deletion(row.model, row.object_id))
+        elif name == "comments" and row.is_deleted:
+            page.deleted.append(Deletion(models.Comment._meta.label_lower, row.pk))
+        else:
+            getattr(page, name).append(row)
+    loaders.prime(page.users + page.epics + page.tasks + page.comments)
+    return page
+
+
+def check_watermark(watermark):
+    if watermark is None:
+        return
+    # older tombstones may have been pruned, so deletions since then can no longer be listed
+    if watermark[0] < timezone.now() - timedelta(days=constant.SYNC_TOMBSTONE_RETENTION_DAYS):
+        raise GraphQLError("Cursor is older than the tombstone retention; sync again without a cursor.")
+
+
+def changes_since(info, cursor=None, first=None):
+    """ Rows written after the cursor across users, epics, tasks, comments and deletions, oldest first """
+    size = page_size(first)
+    watermark = decode_watermark(cursor) if cursor else None
+    check_watermark(watermark)
+
+    # rows stamped just now may belong to transactions that have not committed yet; leave them for the next call
+    until = timezone.now() - timedelta(seconds=constant.SYNC_SETTLE_SECONDS)
+
+    tags = getattr(info.context, "cache_tags", None)
+    if tags is not None:
+        tags.update(list_tag(manager.model) for _, manager, _ in SOURCES)
+        # the settle window moves on without any write, so a cached page is only good that long
+        info.context.cache_max_age = constant.SYNC_SETTLE_SECONDS
+    loaders = get_loaders(info)
+    if loaders.is_async:
+        return _achanges_since(watermark, until, size, loaders)
+
+    entries, has_more = merge(
+        [(index, column, list(queryset)) for index, column, queryset in source_queries(watermark, until, size)],
+        size
+    )
+    return build_page(entries, watermark, has_more, loaders)
+
+
+async def _achanges_since(watermark, until, size, loaders):
+    sources = [
+        (index, column, [row async for row in queryset])
+        for index, column, queryset in source_queries(watermark, until, size)
+    ]
+    entries, has_more = merge(sources, size)
+    return build_page(entries, watermark, has_more, loaders)
@@ -1,3 +1,419 @@
-from django.test import TestCase
+import json
+import re
+import subprocess
+import sys
+import time
+from unittest import mock
+from django.conf import settings
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from jira_board.schema import get_schema
+from resources.all_purpose import constant
+from task import models
+from graphql import parse, validate
+from task.bench.catalogue import OPERATIONS, load_fixtures
+from task.bench.runner import check, run_operation
+from task.board import board_counts, board_tasks
+from task.complexity import QueryComplexityRule
+from task.documents import DocumentCache, query_hash
+from task.importer import UserImporter
+from task.optimizer import first_per_parent
+from task.response_cache import LocalBackend, ResponseCache, instance_tag
+from task.websocket import GraphQLWebSocket
 
-# Create your tests here.
+
+def create_board(epics=2, tasks=5):
+    """ Users, epics and tasks with a subtask and a comment each, enough for the queries under test """
+    users = [
+        models.JiraUser.objects.create(
+            first_name="Test", last_name=f"User{index}", user_name=f"user{index}",
+            email=f"user{index}@example.com", mobile_number=f"90000000{index:02d}", password="x"
+        )
+        for index in range(3)
+    ]
+    for epic_index in range(epics):
+        epic = models.Epic.objects.create(name=f"epic{epic_index}", user=users[epic_index % 3])
+        for task_index in range(tasks):
+            task = models.Task.objects.create(
+                name=f"task{task_index}", description="d", epic=epic,
+                owner=users[task_index % 3], assignee=users[(task_index + 1) % 3], is_completed=task_index % 2 == 0
+            )
+            models.Task.objects.create(
+                name=f"task{task_index}.sub", description="d", epic=epic, owner=users[0], assignee=users[1],
+                parent_task=task, task_type="sub_task"
+            )
+            models.Comment.objects.create(task=task, comment="hello", user=users[2])
+    return users
+
+
+def explain(queryset):
+    # QuerySet.explain() puts the prefix inside the subquery Django wraps around window filters
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+
+
+class IndexUsageTests(TestCase):
+    """ The board's hot queries must be answered from an index, without a full scan or an extra sort """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_board()
+        cls.epic = models.Epic.objects.first()
+        cls.task = models.Task.objects.filter(parent_task=None).first()
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # a test table is a few pages, where a sequential scan always wins; ask which index the planner would use
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertIndexScan(self, queryset, index=None, ordered=False):
+        plan = explain(queryset)
+        # SQLite cannot seek on NOT is_completed, the form Django writes boolean filters in, so only
+        # PostgreSQL, which reads it as is_completed = false, is held to the exact index and order
+        if connection.vendor == "sqlite":
+            self.assertIsNone(re.search(r"\bSCAN (tasks|epics|comments)\b(?! USING)", plan), plan)
+            self.assertIn("SEARCH", plan)
+            return
+        if connection.vendor != "postgresql":
+            self.skipTest(f"no plan assertions for {connection.vendor}")
+
+        self.assertNotIn("Seq Scan", plan)
+        self.assertRegex(plan, r"Index (Only )?Scan|Bitmap Index Scan")
+        if ordered:
+            self.assertIsNone(re.search(r"(?<!Incremental )Sort\b", plan), plan)
+        if index is not None:
+            self.assertIn(index, plan)
+
+    def test_all_tasks_by_epic(self):
+        self.assertIndexScan(
+            models.Task.objects.filter(epic=self.epic).order_by("created_at", "id")[:51],
+            "tasks_epic_created_idx", ordered=True
+        )
+
+    def test_all_tasks_by_epic_and_status(self):
+        self.assertIndexScan(
+            models.Task.objects.filter(epic=self.epic, is_completed=False).order_by("created_at", "id")[:51],
+            "tasks_epic_done_idx", ordered=True
+        )
+
+    def test_all_tasks_by_assignee_and_status(self):
+        self.assertIndexScan(
+            models.Task.objects.filter(assignee=self.users[1], is_completed=False).order_by("created_at", "id")[:51],
+            "tasks_assignee_done_idx", ordered=True
+        )
+
+    def test_epics_by_user(self):
+        self.assertIndexScan(
+            models.Epic.objects.filter(user=self.users[0]).order_by("created_at", "id")[:51],
+            "epics_user_created_idx", ordered=True
+        )
+
+    def test_subtasks_by_parent(self):
+        self.assertIndexScan(
+            first_per_parent(models.Task.objects.filter(parent_task_id__in=[self.task.pk]), "parent_task_id")
+        )
+
+    def test_comments_for_task(self):
+        self.assertIndexScan(
+            models.Comment.objects.filter(task=self.task).order_by("created_at", "id")[:51],
+            "comments_live_task_idx", ordered=True
+        )
+
+    def test_my_board_counts(self):
+        self.assertIndexScan(board_counts(self.users[1]))
+
+    def test_my_board_tasks(self):
+        self.assertIndexScan(board_tasks(self.users[1], [self.epic.pk], 20))
+
+
+def execute(query, variables=None):
+    result = get_schema().execute(query, variable_values=variables, context_value=RequestFactory().post("/graphql/"))
+    if result.errors:
+        raise AssertionError(result.errors)
+    return result.data
+
+
+class NestedBatchingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_board(epics=5, tasks=3)
+
+    def test_comment_count_under_prefetched_lists_is_one_query(self):
+        # epics, the tasks prefetch and one comment count for the tasks of every epic
+        with self.assertNumQueries(3):
+            data = execute("{ allEpics(first: 5) { edges { node { tasks(first: 10) { commentCount } } } } }")
+        counts = [task["commentCount"] for edge in data["allEpics"]["edges"] for task in edge["node"]["tasks"]]
+        self.assertEqual(counts, [1, 0] * 15)
+
+
+class UpdateTasksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_board(epics=1, tasks=1)
+        cls.task = models.Task.objects.get(parent_task=None)
+
+    def test_repeated_id_is_rejected_and_leaves_the_row_alone(self):
+        data = execute(
+            """mutation($tasks: [TaskUpdateInput!]!) {
+                updateTasks(tasks: $tasks) { results { index success message } }
+            }""",
+            {"tasks": [
+                {"id": self.task.pk, "description": "first"},
+                {"id": self.task.pk, "description": "second", "assignee": self.users[0].pk}
+            ]}
+        )
+        self.assertEqual(
+            [(result["success"], result["message"]) for result in data["updateTasks"]["results"]],
+            [(True, "Task updated successfully"), (False, "Task appears more than once in this batch")]
+        )
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.description, self.task.assignee_id), ("first", self.users[1].pk))
+
+
+class BoardCacheTagTests(TestCase):
+    def test_tag_names_the_fetched_user(self):
+        user = create_board(epics=1, tasks=1)[0]
+        for user_id in (str(user.pk), f"0{user.pk}", f" {user.pk}"):
+            context = RequestFactory().post("/graphql/")
+            context.cache_tags = set()
+            result = get_schema().execute(
+                "query($user: ID!) { myBoard(userId: $user) { __typename } }",
+                variable_values={"user": user_id}, context_value=context
+            )
+            self.assertIsNone(result.errors)
+            self.assertIn(instance_tag(models.JiraUser, user.pk), context.cache_tags)
+
+
+class EpicCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_board(epics=1)
+        cls.epic = models.Epic.objects.get()
+
+    def test_create_task_returns_current_counts(self):
+        data = execute(
+            """mutation($epic: ID!, $user: ID!) {
+                createTask(name: "new", description: "d", epic: $epic, owner: $user, assignee: $user) {
+                    task { epic { taskCount openTaskCount } }
+                }
+            }""",
+            {"epic": self.epic.pk, "user": self.users[0].pk}
+        )
+        self.epic.refresh_from_db()
+        self.assertEqual(data["createTask"]["task"]["epic"], {
+            "taskCount": self.epic.task_count, "openTaskCount": self.epic.open_task_count
+        })
+        self.assertEqual(self.epic.task_count, 11)
+
+    def test_create_tasks_returns_counts_after_the_insert(self):
+        data = execute(
+            """mutation($tasks: [TaskInput!]!) {
+                createTasks(tasks: $tasks) { results { task { epic { taskCount completedTaskCount } } } }
+            }""",
+            {"tasks": [
+                {"name": f"bulk{index}", "description": "d", "epic": self.epic.pk, "owner": self.users[0].pk,
+                 "assignee": self.users[1].pk, "isCompleted": index == 0}
+                for index in range(3)
+            ]}
+        )
+        self.epic.refresh_from_db()
+        for result in data["createTasks"]["results"]:
+            self.assertEqual(result["task"]["epic"], {
+                "taskCount": self.epic.task_count, "completedTaskCount": self.epic.completed_task_count
+            })
+        self.assertEqual(self.epic.task_count, 13)
+
+
+class DeleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_board(epics=2, tasks=3)
+        cls.epic = models.Epic.objects.first()
+
+    def statements(self, queries, prefix):
+        return [query["sql"] for query in queries if query["sql"].startswith(prefix)]
+
+    def test_cascade_writes_tombstones_and_counters_once(self):
+        task = models.Task.objects.filter(epic=self.epic, parent_task=None, is_completed=False).first()
+        with CaptureQueriesContext(connection) as queries:
+            task.delete()
+
+        # the task, its subtask and its comment, in one INSERT and one counter UPDATE
+        self.assertEqual(len(self.statements(queries, 'INSERT INTO "tombstones"')), 1)
+        self.assertEqual(len(self.statements(queries, 'UPDATE "epics"')), 1)
+        self.assertEqual(models.Tombstone.objects.count(), 3)
+        self.epic.refresh_from_db()
+        self.assertEqual(
+            (self.epic.task_count, self.epic.open_task_count, self.epic.subtask_count),
+            (4, 2, 2)
+        )
+
+    def test_queryset_delete_is_batched(self):
+        with CaptureQueriesContext(connection) as queries:
+            models.JiraUser.objects.filter(pk=self.users[0].pk).delete()
+
+        self.assertEqual(len(self.statements(queries, 'INSERT INTO "tombstones"')), 1)
+        self.assertTrue(models.Tombstone.objects.filter(model="task.jirauser", object_id=self.users[0].pk).exists())
+        # the user's epic went with it; the other epic only lost the tasks the user owned
+        epic = models.Epic.objects.get()
+        self.assertEqual(epic.task_count, models.Task.objects.filter(epic=epic).count())
+        self.assertLess(epic.task_count, 6)
+
+    def test_other_models_keep_fast_deletes(self):
+        self.assertTrue(Collector(using="default").can_fast_delete(models.Tombstone.objects.all()))
+
+
+class CatalogueTests(TestCase):
+    """ The benchmark catalogue's checks: every operation succeeds through /graphql/ within its SQL budget """
+
+    @classmethod
+    def setUpTestData(cls):
+        create_board()
+
+    @mock.patch("task.views.get_response_cache", return_value=None)
+    def test_operations_succeed_within_sql_budget(self, get_response_cache):
+        client = Client()
+        fixtures = load_fixtures()
+        reports = [
+            run_operation(client, "/graphql/", operation, fixtures, iterations=2, warmup=0)
+            for operation in OPERATIONS
+        ]
+        self.assertEqual(check(reports, OPERATIONS), [])
+
+
+class QueryCostTests(SimpleTestCase):
+    """ The default cost limit lets the catalogue and the board through, and still stops runaway fan-out """
+
+    # variables are priced at MAX_PAGE_SIZE, the most a client may ask for
+    BOARD = """
+    query Board($epics: Int, $tasks: Int) {
+      allEpics(first: $epics) {
+        edges { node { name taskCount openTaskCount
+          tasks(first: $tasks) { name isCompleted owner { userName } assignee { userName } } } }
+      }
+    }
+    """
+
+    def errors(self, query):
+        return [error.message for error in validate(get_schema().graphql_schema, parse(query), [QueryComplexityRule])]
+
+    def test_catalogue_fits(self):
+        for operation in OPERATIONS:
+            with self.subTest(operation.name):
+                self.assertEqual(self.errors(operation.query), [])
+
+    def test_board_with_client_page_sizes_fits(self):
+        self.assertEqual(self.errors(self.BOARD), [])
+
+    def test_nested_fan_out_is_rejected(self):
+        errors = self.errors(
+            "{ allEpics(first: 200) { edges { node { tasks(first: 200) { comments(first: 200) { user { id } } } } } } }"
+        )
+        self.assertEqual(len(errors), 1)
+        self.assertIn("exceeds the limit", errors[0])
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = ResponseCache(
+            LocalBackend(constant.RESPONSE_CACHE_SIZE), LocalBackend(constant.RESPONSE_CACHE_TAG_SIZE), 60
+        )
+
+    def test_hit_until_a_tag_is_invalidated(self):
+        self.assertTrue(self.cache.set("key", {"task": 1}, {"task.task:1", "task.task:list"}, time.time()))
+        self.assertEqual(self.cache.get("key"), {"task": 1})
+
+        self.cache.invalidate({"task.task:1"})
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_result_read_before_a_concurrent_write_is_not_stored(self):
+        started = time.time()
+        # the write commits between the read of the rows and the end of the request
+        self.cache.invalidate({"task.task:1"})
+
+        self.assertFalse(self.cache.set("key", {"task": 1}, {"task.task:1"}, started))
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_responses_do_not_evict_tag_versions(self):
+        tags = {f"task.task:{pk}" for pk in range(constant.RESPONSE_CACHE_SIZE * 2)}
+        self.assertTrue(self.cache.set("key", {"tasks": len(tags)}, tags, time.time()))
+        self.assertEqual(self.cache.get("key"), {"tasks": len(tags)})
+
+
+@override_settings(GRAPHQL_PERSISTED_QUERIES_ONLY=True)
+class PersistedOnlyWebSocketTests(SimpleTestCase):
+    """ Websocket subscriptions answer to the same allowlist as /graphql/ """
+
+    registered = "subscription { taskChanged { kind } }"
+
+    def setUp(self):
+        documents = DocumentCache(constant.DOCUMENT_CACHE_SIZE, {query_hash(self.registered): self.registered})
+        patcher = mock.patch("task.websocket.get_document_cache", return_value=documents)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.socket = GraphQLWebSocket({}, None, None)
+
+    def assertRejected(self, payload, message):
+        errors = self.socket.prepare(payload)
+        self.assertIsInstance(errors, list)
+        self.assertEqual([error.message for error in errors], [message])
+
+    def test_raw_query_is_rejected(self):
+        self.assertRejected({"query": "subscription { epicUpdated { name } }"}, "Only persisted queries are accepted.")
+
+    def test_unregistered_hash_is_rejected(self):
+        query = "subscription { epicUpdated { name } }"
+        self.assertRejected(
+            {"query": query, "extensions": {"persistedQuery": {"sha256Hash": query_hash(query)}}},
+            "Persisted query is not registered."
+        )
+
+    def test_registered_hash_is_served(self):
+        document = self.socket.prepare({"extensions": {"persistedQuery": {"sha256Hash": query_hash(self.registered)}}})
+        self.assertNotIsInstance(document, list)
+
+
+class SchemaStartupTests(SimpleTestCase):
+    """ The schema is built once, on first use, and a fresh process answers its first request within budget """
+
+    def test_schema_is_shared(self):
+        self.assertIs(get_schema(), get_schema())
+
+    def test_fresh_process_builds_one_schema_lazily_within_budget(self):
+        # a new interpreter: this one built the schema long ago
+        probe = subprocess.run(
+            [sys.executable, "-m", "task.bench.startup"],
+            capture_output=True, text=True, cwd=settings.BASE_DIR
+        )
+        self.assertEqual(probe.returncode, 0, probe.stderr)
+        sample = json.loads(probe.stdout.strip().splitlines()[-1])
+
+        self.assertEqual(sample["status"], 200)
+        self.assertFalse(sample["built_at_boot"])
+        self.assertEqual(sample["schemas"], 1)
+        self.assertLess(sample["timings"]["total"], constant.BENCH_STARTUP_BUDGET)
+
+
+class UserImportTests(TestCase):
+    def build(self, password):
+        hasher = mock.Mock(hash_many=lambda passwords: [f"hashed:{password}" for password in passwords])
+        importer = UserImporter(None, hasher)
+        row = {
+            "first_name": "Imported", "last_name": "User", "user_name": "imported", "email": "imported@example.com",
+            "mobile_number": "8000000000", "password": password
+        }
+        return importer, importer.build([(1, row)])
+
+    def test_password_is_hashed_as_written(self):
+        _, pending = self.build("  spaced secret ")
+        self.assertEqual([user.password for _, _, user in pending], ["hashed:  spaced secret "])
+
+    def test_missing_password_is_rejected(self):
+        importer, pending = self.build("")
+        self.assertEqual(pending, [])
+        self.assertEqual(importer.report.rejected, 1)
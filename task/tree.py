@@ -0,0 +1,78 @@
+from collections import defaultdict
+from graphql import GraphQLError
+from resources.all_purpose import constant
+from task import models
+from task.loaders import get_loaders
+
+
+class TreeNode:
+    def __init__(self, task, depth):
+        self.task = task
+        self.depth = depth
+        self.children = []
+
+
+def tree_depth(max_depth):
+    if max_depth is None:
+        return constant.TASK_TREE_MAX_DEPTH
+    if max_depth < 0:
+        raise GraphQLError("maxDepth must not be negative.")
+    return min(max_depth, constant.TASK_TREE_MAX_DEPTH)
+
+
+def build_tree(rows, loaders, max_depth):
+    """ Links the rows of one subtree query into nodes and seeds the subtasks loader with what was read """
+    loaders.prime(rows)
+    children = defaultdict(list)
+    nodes = {}
+    for row in rows:
+        nodes[row.pk] = TreeNode(row, row.depth)
+        children[row.parent_task_id].append(row)
+
+    for row in rows:
+        if row.depth < max_depth:
+            # every child of this row was part of the result, so TaskType.subtasks needs no query
+            loaders.subtasks_by_parent.put(row.pk, children[row.pk])
+        if row.depth > 0:
+            nodes[row.parent_task_id].children.append(nodes[row.pk])
+
+    return nodes[rows[0].pk] if rows else None
+
+
+def load_tree(info, root_id, max_depth=None):
+    """ Returns the TreeNode of root_id with its descendants, read by one recursive query """
+    max_depth = tree_depth(max_depth)
+    loaders = get_loaders(info)
+    queryset = models.Task.objects.subtree(root_id, max_depth)
+    if loaders.is_async:
+        return _aload_tree(queryset, loaders, max_depth)
+    return _require(build_tree(list(queryset), loaders, max_depth))
+
+
+async def _aload_tree(queryset, loaders, max_depth):
+    rows = [row async for row in queryset]
+    return _require(build_tree(rows, loaders, max_depth))
+
+
+def load_ancestors(info, task_id):
+    """ Returns the parent chain of task_id from the top-level task down, read by one recursive query """
+    loaders = get_loaders(info)
+    queryset = models.Task.objects.ancestors(task_id)
+    if loaders.is_async:
+        return _aload_ancestors(queryset, loaders)
+    return _chain(list(queryset), loaders)
+
+
+async def _aload_ancestors(queryset, loaders):
+    return _chain([row async for row in queryset], loaders)
+
+
+def _chain(rows, loaders):
+    loaders.prime(rows)
+    return rows[::-1]
+
+
+def _require(node):
+    if node is None:
+        raise GraphQLError("Task with the given ID does not exist.")
+    return node
@@ -0,0 +1,419 @@
+import inspect
+import json
+import time
+from contextlib import contextmanager
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.http.response import HttpResponseBadRequest
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import ensure_csrf_cookie
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import (
+    ExecutionResult,
+    FieldNode,
+    GraphQLError,
+    OperationType,
+    execute,
+    get_operation_ast,
+    validate_schema
+)
+from graphql.validation import specified_rules
+from jira_board.routers import get_replica_pool, read_from_replica
+from task.complexity import QueryComplexityRule
+from task.documents import DocumentRejected, PersistedQueryNotFound, get_document_cache
+from task.export import EXPORTS, FORMATS, ExportError, Formatter, astream, export_rows, parse_bound, parse_filter_id, stream
+from task.loaders import Loaders
+from task.profiling import ProfilingMiddleware, activate, deactivate, render_metrics, start_profile
+from task.response_cache import CacheTagMiddleware, get_response_cache
+
+
+class BoardGraphQLView(GraphQLView):
+    """ GraphQLView with automatic persisted queries and a cache of parsed, validated documents """
+
+    validation_rules = (*specified_rules, QueryComplexityRule)
+
+    def get_persisted_hash(self, request, data):
+        extensions = data.get("extensions") or request.GET.get("extensions")
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are not valid JSON."))
+        if not isinstance(extensions, dict):
+            return None
+        return (extensions.get("persistedQuery") or {}).get("sha256Hash")
+
+    def load_document(self, request, data, query, operation_name, show_graphiql=False):
+        """ Returns (document, operation_ast, document_key), or the ExecutionResult to answer with instead """
+        sha = self.get_persisted_hash(request, data)
+        documents = get_document_cache()
+
+        if not query and not sha:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        try:
+            sha = documents.checked_hash(query, sha)
+        except DocumentRejected as e:
+            raise HttpError(HttpResponseBadRequest(str(e)))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        try:
+            document, validation_errors = documents.get(
+                schema, sha, query, self.validation_rules, graphene_settings.MAX_VALIDATION_ERRORS
+            )
+        except PersistedQueryNotFound as e:
+            return ExecutionResult(errors=[GraphQLError(str(e))])
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        return document, operation_ast, documents.normalized_hash(sha, document)
+
+    def get_middleware(self, request):
+        middleware = [*(super().get_middleware(request) or [])]
+        if getattr(request, "cache_tags", None) is not None:
+            middleware.append(CacheTagMiddleware())
+        profile = getattr(request, "graphql_profile", None)
+        if profile is not None:
+            middleware.append(ProfilingMiddleware(profile))
+        return middleware or None
+
+    @contextmanager
+    def profiling(self, request, data):
+        """ Profiles the enclosed operation when GRAPHQL_PROFILING selects the request """
+        query, _, operation_name, _ = self.get_graphql_params(request, data)
+        profile = start_profile(request, operation_name, query)
+        if profile is None:
+            yield
+            return
+
+        request.graphql_profile = profile
+        token = activate(profile)
+        try:
+            yield
+        finally:
+            deactivate(token)
+            request.graphql_profile = None
+            profile.finish()
+
+    @contextmanager
+    def database_for(self, request, operation_ast):
+        """ Routes query operations to a read replica unless the client mutated within the sticky window """
+        if operation_ast is None or operation_ast.operation != OperationType.QUERY:
+            if operation_ast is not None and operation_ast.operation == OperationType.MUTATION:
+                request.graphql_mutated = True
+            yield
+            return
+
+        stuck_until = request.COOKIES.get(settings.DATABASE_REPLICA_STICKY_COOKIE, "")
+        if stuck_until.replace(".", "", 1).isdigit() and float(stuck_until) > time.time():
+            yield
+            return
+
+        with read_from_replica() as alias:
+            request.read_alias = alias
+            yield
+
+    def mark_writer(self, request, response):
+        """ Pins a client that just mutated to the primary, so it reads its own writes """
+        if getattr(request, "graphql_mutated", False) and get_replica_pool() is not None:
+            seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                settings.DATABASE_REPLICA_STICKY_COOKIE,
+                str(time.time() + seconds),
+                max_age=seconds,
+                httponly=True,
+                samesite="Lax"
+            )
+        return response
+
+    def get_cache_timeout(self, request):
+        # resolvers whose results change with time alone cap the lifetime through request.cache_max_age
+        timeouts = [getattr(request, "cache_max_age", None)]
+        # replica results may lag a write whose invalidation already ran; let them expire with the lag window
+        if getattr(request, "read_alias", None) is not None:
+            timeouts.append(settings.DATABASE_REPLICA_STICKY_SECONDS)
+        timeouts = [timeout for timeout in timeouts if timeout is not None]
+        return min(timeouts) if timeouts else None
+
+    def dispatch(self, request, *args, **kwargs):
+        return self.mark_writer(request, super().dispatch(request, *args, **kwargs))
+
+    def get_response(self, request, data, show_graphiql=False):
+        with self.profiling(request, data):
+            return super().get_response(request, data, show_graphiql)
+
+    def json_encode(self, request, d, pretty=False):
+        profile = getattr(request, "graphql_profile", None)
+        if profile is not None and profile.expose:
+            d = dict(d, extensions={"profile": profile.summary()})
+        return super().json_encode(request, d, pretty)
+
+    def get_response_cache(self, operation_ast):
+        if operation_ast is None or operation_ast.operation != OperationType.QUERY:
+            return None
+        return get_response_cache()
+
+    def get_execute_options(self, request, variables, operation_name):
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+        return execute_options
+
+    def run_document(self, request, document, operation_ast, variables, operation_name):
+        with self.database_for(request, operation_ast):
+            return self.execute_document(request, document, operation_ast, variables, operation_name)
+
+    def execute_document(self, request, document, operation_ast, variables, operation_name):
+        schema = self.schema.graphql_schema
+        try:
+            execute_options = self.get_execute_options(request, variables, operation_name)
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        loaded = self.load_document(request, data, query, operation_name, show_graphiql)
+        if not isinstance(loaded, tuple):
+            return loaded
+
+        document, operation_ast, document_key = loaded
+        cache = self.get_response_cache(operation_ast)
+        if cache is None:
+            return self.run_document(request, document, operation_ast, variables, operation_name)
+
+        cache_key = cache.make_key(document_key, operation_name, variables)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return ExecutionResult(data=cached)
+
+        request.cache_tags = set()
+        started = time.time()
+        result = self.run_document(request, document, operation_ast, variables, operation_name)
+        if not result.errors:
+            cache.set(cache_key, result.data, request.cache_tags, started, self.get_cache_timeout(request))
+        return result
+
+
+class AsyncGraphQLView(BoardGraphQLView):
+    """ GraphQLView for ASGI: queries and GRAPHQL_ASYNC_MUTATIONS run on the async executor, other mutations
+    on Django's sync thread """
+
+    view_is_async = True
+
+    @method_decorator(ensure_csrf_cookie)
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                    )
+                )
+
+            data = self.parse_body(request)
+            show_graphiql = self.graphiql and self.can_display_graphiql(request, data)
+
+            if show_graphiql:
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            if self.batch:
+                responses = [await self.get_response_async(request, entry) for entry in data]
+                result = "[{}]".format(
+                    ",".join([response[0] for response in responses])
+                )
+                status_code = (
+                    responses
+                    and max(responses, key=lambda response: response[1])[1]
+                    or 200
+                )
+            else:
+                result, status_code = await self.get_response_async(request, data, show_graphiql)
+
+            return self.mark_writer(request, HttpResponse(
+                status=status_code, content=result, content_type="application/json"
+            ))
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(
+                request, {"errors": [self.format_error(e)]}
+            )
+            return response
+
+    async def get_response_async(self, request, data, show_graphiql=False):
+        with self.profiling(request, data):
+            query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+            execution_result = await self.execute_graphql_request_async(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+
+            status_code = 200
+            if execution_result:
+                response = {}
+
+                if execution_result.errors:
+                    response["errors"] = [
+                        self.format_error(e) for e in execution_result.errors
+                    ]
+
+                if execution_result.errors and any(
+                    not getattr(e, "path", None) for e in execution_result.errors
+                ):
+                    status_code = 400
+                else:
+                    response["data"] = execution_result.data
+
+                if self.batch:
+                    response["id"] = id
+                    response["status"] = status_code
+
+                result = self.json_encode(request, response, pretty=show_graphiql)
+            else:
+                result = None
+
+            return result, status_code
+
+    def runs_async(self, operation_ast):
+        """ Whether a mutation can run on the event loop: every root field is in GRAPHQL_ASYNC_MUTATIONS """
+        if operation_ast.operation != OperationType.MUTATION:
+            return False
+        if graphene_settings.ATOMIC_MUTATIONS is True or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True:
+            # a transaction cannot span awaits
+            return False
+        return all(
+            isinstance(selection, FieldNode) and selection.name.value in settings.GRAPHQL_ASYNC_MUTATIONS
+            for selection in operation_ast.selection_set.selections
+        )
+
+    async def execute_graphql_request_async(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        loaded = self.load_document(request, data, query, operation_name, show_graphiql)
+        if not isinstance(loaded, tuple):
+            return loaded
+
+        document, operation_ast, document_key = loaded
+        if operation_ast is not None and operation_ast.operation != OperationType.QUERY and not self.runs_async(operation_ast):
+            # mutations keep their synchronous resolvers and transaction handling
+            return await sync_to_async(self.run_document)(
+                request, document, operation_ast, variables, operation_name
+            )
+
+        cache = self.get_response_cache(operation_ast)
+        if cache is not None:
+            cache_key = cache.make_key(document_key, operation_name, variables)
+            cached = await sync_to_async(cache.get)(cache_key)
+            if cached is not None:
+                return ExecutionResult(data=cached)
+            request.cache_tags = set()
+            started = time.time()
+
+        request.board_loaders = Loaders(is_async=True)
+        try:
+            with self.database_for(request, operation_ast):
+                result = execute(
+                    self.schema.graphql_schema,
+                    document,
+                    **self.get_execute_options(request, variables, operation_name)
+                )
+                if inspect.isawaitable(result):
+                    result = await result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        if cache is not None and not result.errors:
+            await sync_to_async(cache.set)(
+                cache_key, result.data, request.cache_tags, started, self.get_cache_timeout(request)
+            )
+        return result
+
+
+def graphql_metrics(request):
+    """ Request latency, connection and pool metrics in the Prometheus text format """
+    if not (settings.GRAPHQL_PROFILING or settings.DB_POOL):
+        raise Http404
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4")
+
+
+def board_export(request, kind):
+    """ Streams every task or comment as NDJSON or CSV, optionally limited to ?epic= and ?since=/?until= on updated_at """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if kind not in EXPORTS:
+        raise Http404
+
+    output_format = request.GET.get("format", "ndjson")
+    try:
+        formatter = Formatter(kind, output_format)
+        rows = export_rows(
+            kind,
+            epic_id=parse_filter_id(request.GET.get("epic"), "epic"),
+            updated_since=parse_bound(request.GET.get("since"), "since"),
+            updated_before=parse_bound(request.GET.get("until"), "until")
+        )
+    except ExportError as e:
+        return HttpResponseBadRequest(str(e))
+
+    # under ASGI a synchronous iterator would be consumed whole before the first byte is sent
+    content = astream(formatter, rows) if settings.GRAPHQL_ASYNC else stream(formatter, rows)
+    response = StreamingHttpResponse(content, content_type=FORMATS[output_format])
+    response["Content-Disposition"] = f'attachment; filename="{kind}.{output_format}"'
+    return response
@@ -0,0 +1,194 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from graphene_django.settings import graphene_settings
+from graphql import ExecutionResult, GraphQLError, OperationType, get_operation_ast, subscribe
+from resources.all_purpose import constant
+from task.documents import DocumentRejected, PersistedQueryNotFound, get_document_cache
+from task.loaders import Loaders
+from task.views import BoardGraphQLView
+
+PROTOCOL = "graphql-transport-ws"
+
+
+class SubscriptionContext:
+    """ info.context of a websocket operation; holds the loaders of the event being resolved """
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.board_loaders = Loaders(is_async=True)
+
+
+class GraphQLWebSocket:
+    """ One websocket speaking the graphql-transport-ws protocol; only subscription operations are served """
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self.acknowledged = False
+        self.closed = False
+        self.operations = {}
+
+    async def send(self, message):
+        async with self._send_lock:
+            if not self.closed:
+                await self._send(message)
+
+    async def send_json(self, message):
+        await self.send({"type": "websocket.send", "text": json.dumps(message)})
+
+    async def close(self, code, reason=""):
+        await self.send({"type": "websocket.close", "code": code, "reason": reason})
+        self.closed = True
+
+    async def run(self):
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+        if PROTOCOL not in self.scope.get("subprotocols", []):
+            await self.close(4406, "Subprotocol not acceptable")
+            return
+        await self.send({"type": "websocket.accept", "subprotocol": PROTOCOL})
+
+        watchdog = asyncio.create_task(self.expect_init())
+        try:
+            while not self.closed:
+                message = await self.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message["type"] == "websocket.receive":
+                    await self.handle(message.get("text") or message.get("bytes") or "")
+        finally:
+            self.closed = True
+            watchdog.cancel()
+            for operation in self.operations.values():
+                operation.cancel()
+            await sync_to_async(close_old_connections)()
+
+    async def expect_init(self):
+        await asyncio.sleep(constant.SUBSCRIPTION_INIT_TIMEOUT)
+        if not self.acknowledged:
+            await self.close(4408, "Connection initialisation timeout")
+
+    async def handle(self, text):
+        try:
+            message = json.loads(text)
+            kind = message["type"]
+        except (ValueError, TypeError, KeyError):
+            await self.close(4400, "Invalid message")
+            return
+
+        if kind == "connection_init":
+            if self.acknowledged:
+                await self.close(4429, "Too many initialisation requests")
+                return
+            self.acknowledged = True
+            await self.send_json({"type": "connection_ack"})
+        elif kind == "ping":
+            await self.send_json({"type": "pong"})
+        elif kind == "pong":
+            pass
+        elif kind == "subscribe":
+            await self.start(message)
+        elif kind == "complete":
+            operation = self.operations.pop(message.get("id"), None)
+            if operation is not None:
+                operation.cancel()
+        else:
+            await self.close(4400, f"Unknown message type {kind!r}")
+
+    async def start(self, message):
+        if not self.acknowledged:
+            await self.close(4401, "Unauthorized")
+            return
+        operation_id = message.get("id")
+        payload = message.get("payload")
+        if not isinstance(operation_id, str) or not isinstance(payload, dict):
+            await self.close(4400, "Invalid subscribe message")
+            return
+        if operation_id in self.operations:
+            await self.close(4409, f"Subscriber for {operation_id} already exists")
+            return
+        if len(self.operations) >= constant.SUBSCRIPTION_MAX_PER_CONNECTION:
+            await self.send_errors(operation_id, [GraphQLError(
+                f"At most {constant.SUBSCRIPTION_MAX_PER_CONNECTION} subscriptions per connection."
+            )])
+            return
+        self.operations[operation_id] = asyncio.create_task(self.execute(operation_id, payload))
+
+    async def send_errors(self, operation_id, errors):
+        await self.send_json({"id": operation_id, "type": "error", "payload": [error.formatted for error in errors]})
+
+    def prepare(self, payload):
+        """ Returns the parsed, validated subscription document, or the errors to answer with """
+        query = payload.get("query")
+        sha = ((payload.get("extensions") or {}).get("persistedQuery") or {}).get("sha256Hash")
+        documents = get_document_cache()
+        try:
+            sha = documents.checked_hash(query, sha)
+        except DocumentRejected as e:
+            return [GraphQLError(str(e))]
+
+        try:
+            document, errors = documents.get(
+                graphene_settings.SCHEMA.graphql_schema,
+                sha,
+                query,
+                BoardGraphQLView.validation_rules,
+                graphene_settings.MAX_VALIDATION_ERRORS
+            )
+        except PersistedQueryNotFound as e:
+            return [GraphQLError(str(e))]
+        if errors:
+            return errors
+
+        operation_ast = get_operation_ast(document, payload.get("operationName"))
+        if operation_ast is None or operation_ast.operation != OperationType.SUBSCRIPTION:
+            # queries and mutations keep the HTTP path, with its response cache and replica routing
+            return [GraphQLError("Only subscriptions are served over websockets; send queries and mutations to /graphql/.")]
+        return document
+
+    async def execute(self, operation_id, payload):
+        """ Streams the events of one subscription; cancelled when the client completes it or disconnects """
+        try:
+            prepared = self.prepare(payload)
+            if isinstance(prepared, list):
+                await self.send_errors(operation_id, prepared)
+                return
+
+            stream = await subscribe(
+                graphene_settings.SCHEMA.graphql_schema,
+                prepared,
+                context_value=SubscriptionContext(self.scope),
+                variable_values=payload.get("variables"),
+                operation_name=payload.get("operationName")
+            )
+            if isinstance(stream, ExecutionResult):
+                await self.send_errors(operation_id, stream.errors)
+                return
+
+            try:
+                async for result in stream:
+                    await self.send_json({"id": operation_id, "type": "next", "payload": result.formatted})
+                    # the socket outlives any request, so apply CONN_MAX_AGE after every event like a request would
+                    await sync_to_async(close_old_connections)()
+            except GraphQLError as e:
+                await self.send_json({"id": operation_id, "type": "next", "payload": {"errors": [e.formatted]}})
+            finally:
+                await stream.aclose()
+            await self.send_json({"id": operation_id, "type": "complete"})
+        finally:
+            self.operations.pop(operation_id, None)
+
+
+async def graphql_websocket(scope, receive, send):
+    """ ASGI application for websocket connections to /graphql/ """
+    if scope["path"].rstrip("/") != "/graphql":
+        message = await receive()
+        if message["type"] == "websocket.connect":
+            await send({"type": "websocket.close", "code": 4404})
+        return
+    await GraphQLWebSocket(scope, receive, send).run()